@@ -1,120 +1,425 @@
 import streamlit as st
-from supabase import create_client, Client
 import pandas as pd
 import os
-import requests  # For API call
+import logging
 from dotenv import load_dotenv
 import hmac, hashlib
 from streamlit_option_menu import option_menu
 import base64, json
-import time, io
-from docx import Document
-import leafmap.foliumap as leafmap
+import time, io, itertools
+import streamlit.components.v1 as components
 
 # Load environment variables
 load_dotenv()
 
-# Supabase Credentials (Replace with your Supabase details)
-url: str  = os.environ.get("SUPABASE_URL")
-key: str  = os.environ.get("SUPABASE_KEY")
-
-# Initialize Supabase Client
-supabase: Client = create_client(url, key)
-
-# Function to fetch job data
-def fetch_jobs(hashed_id):
-    response = supabase.table("JOB").select("job_title, COMPANY!inner(company_name), job_skills_required, job_experience_level, job_url, job_id, USER_JOB!inner(user_id)").eq("USER_JOB.user_id", hashed_id).execute()
-    if response.data:
-        df = pd.DataFrame(response.data)
-        df.drop(columns=["USER_JOB"], inplace=True)
-        df["company_name"] = df["COMPANY"].apply(lambda x: x["company_name"])
-        df.drop(columns=["COMPANY"], inplace=True)
-        return df  # Convert to DataFrame
-    return pd.DataFrame(columns=["job_title", "company_name", "job_skills_required", "job_experience_level", "job_url", "job_id"])  # Empty Table
-
-# Function to delete a job by ID
-def delete_job(job_id):
-    response = supabase.table("USER_JOB").delete().eq("job_id", job_id).eq("user_id", hashed_id).execute()
-    return response
+# Local modules read their settings from the environment, so import them after load_dotenv
+from cache import TTLCache
+from memory import MEMORY_BUDGET_MB, MemoryBudget, estimate_bytes
+from db import JobStore, create_data_client
+from export import CSV_MIME, XLSX_MIME, ExportCache
+from geo import LocationIndex, build_map_html
+from listings import page_slice, pagination_controls, render_listings_cards, render_listings_grid
+from ranking import RankingIndex, extract_pdf_text
+from dedup import DuplicateIndex
+from search import QueryError, SearchIndex, filter_frame, skill_facet_options
+from tracing import TRACING, tracer
+from backend import BackendClient, BackendError, JOB_BACKEND_URL, SIMILARITY_JOB_IDS, SKILLS_BACKEND_URL
+from cover_letters import DOCX_MIME, ZIP_MIME, ZipBuilder, build_docx, generate_batch
+from prefetch import PREFETCH, Prefetcher
+
+logger = logging.getLogger(__name__)
+
+# Initialize the data client once per process (Supabase, or the in-memory stand-in with DATA_BACKEND=memory)
+@st.cache_resource
+def get_data_client():
+    return create_data_client()
+
+db_client = get_data_client()
+
+# Per-user cache of listings, locations and usernames, shared across reruns and sessions
+@st.cache_resource
+def get_job_store():
+    return JobStore(db_client, maxsize=int(os.environ.get("JOB_CACHE_SIZE", 256)), ttl=int(os.environ.get("JOB_CACHE_TTL", 300)),
+                    skills_maxsize=int(os.environ.get("SKILLS_CACHE_SIZE", 200_000)))
+
+job_store = get_job_store()
+
+# Pooled HTTP clients for the AI backends, shared across reruns and sessions
+@st.cache_resource
+def get_backends():
+    return {"job": BackendClient(JOB_BACKEND_URL), "skills": BackendClient(SKILLS_BACKEND_URL)}
+
+backends = get_backends()
+
+# Background loader warming job_store for new sessions, shared so concurrent loads are deduplicated
+@st.cache_resource
+def get_prefetcher():
+    return Prefetcher()
+
+prefetcher = get_prefetcher()
+
+# Memoized resume analysis results, keyed by resume content hash
+@st.cache_resource
+def get_analysis_cache():
+    return TTLCache(maxsize=int(os.environ.get("ANALYSIS_CACHE_SIZE", 512)), ttl=int(os.environ.get("ANALYSIS_CACHE_TTL", 86400)))
+
+analysis_cache = get_analysis_cache()
+
+# In-memory CSV/Excel exports, keyed by user and job-set version
+@st.cache_resource
+def get_export_cache():
+    return ExportCache()
+
+exports = get_export_cache()
+
+# Rendered map HTML per (user, job-set version, visualization)
+@st.cache_resource
+def get_map_cache():
+    return TTLCache(maxsize=int(os.environ.get("MAP_CACHE_SIZE", 64)), ttl=int(os.environ.get("MAP_CACHE_TTL", 3600)), sizeof=estimate_bytes)
+
+map_cache = get_map_cache()
+
+# Indexes derived from a user's data, per (kind, user, job-set version)
+@st.cache_resource
+def get_index_cache():
+    return TTLCache(maxsize=int(os.environ.get("INDEX_CACHE_SIZE", 128)), ttl=int(os.environ.get("INDEX_CACHE_TTL", 3600)), sizeof=estimate_bytes)
+
+index_cache = get_index_cache()
+
+# Process-wide cap on cached per-user data; the least recently active users are evicted first
+@st.cache_resource
+def get_memory_budget():
+    budget = MemoryBudget(int(MEMORY_BUDGET_MB * 2 ** 20))
+    budget.register(job_store.nbytes, job_store.evict)
+    budget.register_cache(index_cache, owner=lambda key: key[1])
+    budget.register_cache(map_cache, owner=lambda key: key[0])
+    budget.register_cache(exports.cache, owner=lambda key: key[0])
+    return budget
+
+memory_budget = get_memory_budget()
+
+# Data each new session starts loading in the background, by store kind
+PREFETCH_LOADS = {"jobs": job_store.warm, "locations": job_store.job_locations}
+
+# Function to start prefetching a user's data once per session; switching users cancels the
+# previous user's loads that haven't started yet
+def start_prefetch(hashed_id):
+    previous = st.session_state.get("prefetch_user")
+    if previous == hashed_id:
+        return
+    if previous:
+        prefetcher.cancel([(previous, kind) for kind in PREFETCH_LOADS])
+    st.session_state["prefetch_user"] = hashed_id
+    st.session_state["prefetch"] = {
+        kind: prefetcher.submit((hashed_id, kind), lambda load=load: load(hashed_id))
+        for kind, load in PREFETCH_LOADS.items()
+        if not job_store.cached(hashed_id, kind)
+    }
+
+# Function to wait for an in-flight background load before reading job_store; if there is none,
+# or it was cancelled or failed, the read fetches synchronously as usual
+def await_prefetch(hashed_id, kind):
+    with tracer.span("prefetch.wait", kind=kind, pending=prefetcher.pending((hashed_id, kind))):
+        prefetcher.wait((hashed_id, kind))
+
+# Function to get a user's company locations (usually already loaded by the session's prefetch)
+def job_locations(hashed_id):
+    await_prefetch(hashed_id, "locations")
+    return job_store.job_locations(hashed_id)
 
 # Function to hash credentials
 def hash_id(user_id):
     return hmac.new(os.getenv("HASH_SECRET").encode(), user_id.encode(), hashlib.sha256).hexdigest()
 
-def encode_pdf(pdf_bytes):
-    """Encodes PDF bytes into a JSON-serializable Base64 string."""
-    base64_pdf = base64.b64encode(pdf_bytes).decode("utf-8")  # Convert bytes → Base64 → String
-    return base64_pdf  # Store in a JSON object
-
-# Function to call API for resume analysis
-def process_resume(resume_text, user_id):
-    API_URL = "https://job-scraper-backend-e616ed8dec66.herokuapp.com/get_similarity"  # Replace with actual API URL
-    # API_URL = "http://127.0.0.1:5000/get_similarity"
-    response = requests.post(API_URL, json={"resume_contents": encode_pdf(resume_text), "user_id": user_id})
-    
-    if response.status_code == 200:
-        return response.json()["result"]  # Assumes JSON response with similarity_score, compatible_skills, missing_skills
-
-# Function to call API for cover letter generation
-def generate_cover_letter(job_id, resume_bytes):
-    API_URL = "https://job-scraper-backend-e616ed8dec66.herokuapp.com/generate_cover_letter"  # Replace with actual API URL
-    # API_URL = "http://127.0.0.1:5000/generate_cover_letter"
-    response = requests.post(API_URL, json={"job_id": job_id, "resume_contents": encode_pdf(resume_bytes)})
-
-    if response.status_code == 200:
-        return response.json()["cover_letter"]
+# Jobs scored locally before the AI backend refines the best of them
+RANK_TOP_K = int(os.environ.get("RANK_TOP_K", 20))
+
+# Function to call API for resume analysis, optionally only for the given (pre-ranked) jobs
+def process_resume(resume_text, user_id, job_ids=None):
+    if not SIMILARITY_JOB_IDS:
+        job_ids = None  # The backend can't narrow the scoring down yet
+    # Scores only change with the resume or the user's saved job set
+    cache_key = ("similarity", hashlib.sha256(resume_text).hexdigest(), job_store.version(hash_id(user_id)), tuple(job_ids or ()))
+    result = analysis_cache.get(cache_key)
+    if result is not None:
+        return result
+    payload = {"user_id": user_id}
+    if job_ids:
+        payload["job_ids"] = list(job_ids)
+    try:
+        # Assumes JSON response with similarity_score, compatible_skills, missing_skills
+        result = backends["job"].post_resume("/get_similarity", payload, resume_text)["result"]
+    except BackendError as e:
+        logger.warning("Similarity request failed: %s", e)
+        return None
+    if result:
+        analysis_cache.set(cache_key, result)
+    return result
+
+# Function to stream cover letter generation from the API, collecting the raw chunks into `parts`
+def generate_cover_letter(job_id, resume_bytes, parts):
+    try:
+        for event, data in backends["job"].stream_resume("/generate_cover_letter", {"job_id": job_id, "stream": True}, resume_bytes):
+            if event == "json":
+                data = data.get("cover_letter") or ""  # Backend without streaming support
+            elif event != "message":
+                continue
+            if not data:
+                continue
+            parts.append(data)
+            yield data
+    except BackendError as e:
+        logger.warning("Cover letter for job %s failed: %s", job_id, e)
+        if parts:
+            st.error("❌ Cover letter generation was interrupted. Try again.")
 
 # Function to convert cover letter to DOCX
 def convert_to_docx(cover_letter):
-    docx_data = io.BytesIO()
-    docx = Document()
-    docx.add_paragraph(cover_letter)
-    docx.save(docx_data)
-    docx_data.seek(0)
-    return docx_data
-
-# Function to stream cover letter
-def stream_text(text):
-    for word in text.replace("\n", "\n\n").split(" "):
-        yield word + " "
-        time.sleep(0.02)
-
-# Function to call API for skills recommendation
-def recommend_skills(resume_bytes, occupation):
-    API_URL = "https://job-skills-recommendation-b2836b73c13e.herokuapp.com/get_skills_recommendation"  # Replace with your actual API URL
-    response = requests.post(API_URL, json={
-        "resume_contents": encode_pdf(resume_bytes),
-        "job_occupation": occupation
-    })
-    if response.status_code == 200:
-        return response.json().get("skills", ""), response.json().get("context", [])
-    else:
+    return io.BytesIO(build_docx(cover_letter))
+
+# Function to generate cover letters for several jobs concurrently, showing per-job progress;
+# returns ({job_id: DOCX bytes}, {job_id: error}, ZIP bytes) including any letters already in `docs`.
+# Letters are written into the ZIP as they arrive.
+def generate_cover_letter_batch(job_ids, labels, resume_bytes, docs=None):
+    docs = dict(docs or {})
+    archive = ZipBuilder()
+    for job_id, docx in docs.items():
+        archive.add(f"{job_id}_cover_letter.docx", docx)
+    statuses = {job_id: "⏳ Queued" for job_id in job_ids}
+    errors = {}
+    progress = st.progress(0.0, text=f"Generating {len(job_ids)} cover letters...")
+    table = st.empty()
+    for job_id, status, attempt, payload in generate_batch(backends["job"], job_ids, resume_bytes):
+        if status == "generating":
+            statuses[job_id] = "✍️ Generating" + (f" (retry {attempt})" if attempt else "")
+        elif status == "retrying":
+            statuses[job_id] = "🔁 Retrying"
+        elif status == "done":
+            docs[job_id] = payload
+            archive.add(f"{job_id}_cover_letter.docx", payload)
+            errors.pop(job_id, None)
+            statuses[job_id] = "✅ Done"
+        else:
+            errors[job_id] = payload
+            statuses[job_id] = f"❌ Failed: {payload}"
+        finished = sum(job_id in docs for job_id in job_ids)
+        progress.progress(finished / len(job_ids), text=f"{finished} of {len(job_ids)} cover letters ready")
+        table.dataframe(
+            pd.DataFrame({"Job": [labels.get(j, j) for j in statuses], "Status": list(statuses.values())}),
+            hide_index=True,
+            width="stretch",
+        )
+    return docs, errors, archive
+
+# Function to render streamed text as markdown paragraphs
+def stream_text(chunks):
+    for chunk in chunks:
+        yield chunk.replace("\n", "\n\n")
+
+# Function to hold a spinner until the first streamed chunk arrives
+def wait_for_first_chunk(chunks, message):
+    with st.spinner(message):
+        first = next(chunks, None)
+    if first is None:
+        return None
+    return itertools.chain([first], chunks)
+
+# Function to stream skills recommendations from the API, collecting the raw chunks into `parts`
+# and the reference links into `context`
+def recommend_skills(resume_bytes, occupation, parts, context):
+    cache_key = ("skills", hashlib.sha256(resume_bytes).hexdigest(), " ".join(occupation.lower().split()))
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        parts.append(cached[0])
+        context.extend(cached[1])
+        yield cached[0]
+        return
+    try:
+        for event, data in backends["skills"].stream_resume("/get_skills_recommendation", {
+            "job_occupation": occupation,
+            "stream": True
+        }, resume_bytes):
+            if event == "json":
+                context.extend(data.get("context", []))  # Backend without streaming support
+                data = data.get("skills", "")
+            elif event == "context":
+                context.extend(json.loads(data))
+                continue
+            elif event != "message":
+                continue
+            if not data:
+                continue
+            parts.append(data)
+            yield data
+    except (BackendError, ValueError) as e:
+        logger.warning("Skills recommendation failed: %s", e)
         st.error("Failed to retrieve skills recommendations.")
-        return []
-
-# Function to fetch job locations
-def fetch_job_locations(hashed_id):
-    response = supabase.table("JOB").select("COMPANY!inner(company_id, company_name, company_lat, company_long, company_address), USER_JOB!inner(user_id)").eq("USER_JOB.user_id", hashed_id).execute()
-    job_listings = fetch_jobs(hashed_id)
-    if response.data:
-        df = pd.DataFrame(response.data)
-        df.drop(columns=["USER_JOB"], inplace=True)
-        df["company_id"] = df["COMPANY"].apply(lambda x: x["company_id"])
-        df["company_name"] = df["COMPANY"].apply(lambda x: x["company_name"])
-        df["company_long"] = df["COMPANY"].apply(lambda x: x["company_long"])
-        df["company_lat"] = df["COMPANY"].apply(lambda x: x["company_lat"])
-        df["company_address"] = df["COMPANY"].apply(lambda x: x["company_address"])
-        df.drop(columns=["COMPANY"], inplace=True)
-        
-        # Calculate the count of jobs from each company
-        job_counts = job_listings["company_name"].value_counts().to_dict()
-        df["count"] = df["company_name"].map(job_counts).fillna(0).astype(int)
-        
-        # Ensure each company_id is only added once
-        df = df.drop_duplicates(subset=["company_id"])
-        
-        return df  # Convert to DataFrame
-    return pd.DataFrame(columns=["company_id", "company_name", "company_long", "company_lat", "company_address", "count"])  # Empty Table
+        return
+    if parts:
+        analysis_cache.set(cache_key, ("".join(parts), list(context)))
+
+# Function to keep the company locations that can be mapped; companies with any missing field are
+# listed as missing on the map page, so the map, the distance filter and the spatial index all skip them
+def mappable_locations(locations):
+    return locations.dropna()
+
+# Function to get the spatial index over a user's mappable company locations
+def location_index(hashed_id):
+    return index_cache.get_or_set(("locations", hashed_id, job_store.version(hashed_id)), lambda: LocationIndex(mappable_locations(job_locations(hashed_id))))
+
+# Skill facets offered next to the listings search
+SKILL_FACETS = int(os.environ.get("SKILL_FACETS", 30))
+
+def synced_index(kind, factory, hashed_id):
+    # One index of each kind per user, updated in place (only for the jobs that changed) when the job set changes
+    index = index_cache.get_or_set((kind, hashed_id), factory)
+    version = job_store.version(hashed_id)
+    if index.version != version:
+        index.sync(job_store.jobs(hashed_id, skills=True), version)
+        index_cache.resize((kind, hashed_id))
+    return index
+
+def search_index(hashed_id):
+    return synced_index("search", SearchIndex, hashed_id)
+
+# Function to render the search box and skill facets; returns the matching Job IDs, or None when not searching
+def search_filter(hashed_id, key):
+    index = search_index(hashed_id)
+    search_col, facet_col = st.columns([1, 1])
+    with search_col:
+        query = st.text_input(
+            "🔎 Search listings",
+            key=f"{key}_query",
+            placeholder="e.g. Java AND Spring, not senior",
+            help="Matches title, company, experience level and requirements. Combine terms with AND / OR / NOT "
+                 "(or , and -), group with parentheses, quote phrases, use a trailing * for prefixes and "
+                 "title: company: level: skill: to search one field.",
+        )
+    try:
+        matches = index.search(query)
+    except QueryError as e:
+        st.warning(f"⚠️ {e}: showing all listings.")
+        query, matches = "", index.search()
+    with facet_col:
+        selected = st.session_state.get(f"{key}_skills", [])
+        options = skill_facet_options(index, index.facets(matches if query.strip() else None, SKILL_FACETS), selected)
+        skills = st.multiselect("Required skills", list(options), format_func=options.get, key=f"{key}_skills")
+    if not query.strip() and not skills:
+        return None
+    return index.narrow(matches, skills)
+
+def ranking_index(hashed_id):
+    return synced_index("ranking", RankingIndex, hashed_id)
+
+def duplicate_index(hashed_id):
+    # Near-duplicate clusters per user; signatures are only computed for newly added jobs
+    return synced_index("dedup", DuplicateIndex, hashed_id)
+
+def distinct_job_ids(hashed_id):
+    # Job IDs with near-duplicates left out, or None when the user has none (the backend then scores every job)
+    duplicates = duplicate_index(hashed_id).duplicates()
+    if not duplicates:
+        return None
+    return [job_id for job_id in job_store.jobs(hashed_id)["job_id"].tolist() if job_id not in duplicates]
+
+def resume_text(resume_bytes):
+    # Extracted text per resume content hash; None if the PDF has no extractable text
+    cache_key = ("resume_text", hashlib.sha256(resume_bytes).hexdigest())
+    text = analysis_cache.get(cache_key)
+    if text is None:
+        text = extract_pdf_text(resume_bytes) or ""
+        analysis_cache.set(cache_key, text)
+    return text.strip() or None
+
+def rank_resume(resume_bytes, hashed_id, top_k=RANK_TOP_K):
+    # Local TF-IDF and skill-coverage ranking of the user's jobs, or None if the resume text can't be read
+    text = resume_text(resume_bytes)
+    if text is None:
+        return None
+    duplicates = duplicate_index(hashed_id).duplicates()
+    with tracer.span("rank local", top_k=top_k, skipped=len(duplicates)):
+        return ranking_index(hashed_id).score(text, top_k, exclude=duplicates)
+
+def render_similarity(analysis_data, note):
+    # Ensure correct column ordering & sorting by similarity score
+    analysis_data = analysis_data[["position", "company", "similarity_score", "compatible_skills", "missing_skills"]]
+    analysis_data = analysis_data.sort_values(by="similarity_score", ascending=False)
+
+    # Display Table Headers
+    st.write(note)
+
+    header_col1, header_col2, header_col3, header_col4, header_col5 = st.columns([1, 1, 2, 3, 3])
+    with header_col1:
+        st.subheader("Position")
+    with header_col2:
+        st.subheader("Company")
+    with header_col3:
+        tooltip = '''# How is this score calculated?
+
+    The similarity score is calculated using:
+    - BERT Similarity (Semantic meaning)
+    - TF-IDF Similarity (Keyword matching)
+    - Skill Compatibility Ratio
+
+    A higher score means a better job fit. Quick matches are scored locally without BERT
+    and refined by the AI for the top listings.
+    '''
+        st.subheader("Similarity Score", help=tooltip)
+
+    with header_col4:
+        st.subheader("Compatible Skills")
+    with header_col5:
+        st.subheader("Missing Skills")
+
+    # Display each job listing in structured columns
+    for index, row in analysis_data.iterrows():
+        col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 3, 3])
+
+        with col1:
+            st.write(f"**{row['position']}**")
+
+        with col2:
+            st.write(row['company'])
+
+        with col3:
+            similarity_score = f"{row['similarity_score']:.2%}"  # Convert to percentage
+            st.write(f"🟢 {similarity_score}")  # Add emoji for visual effect
+
+        with col4:
+            compatible_skills = row["compatible_skills"] if row["compatible_skills"] else "None"
+            st.write(compatible_skills)
+
+        with col5:
+            missing_skills = row["missing_skills"] if row["missing_skills"] else "None"
+            st.write(missing_skills)
+
+        st.markdown("---")
+
+# Function to render the distance filter; returns (filter settings, matching companies) or (None, None) when off.
+# Locations are only loaded (with `load_locations`) once a distance mode is selected.
+def distance_filter(hashed_id, load_locations, key):
+    with st.expander("📍 Filter by distance"):
+        mode = st.radio("Show", ["All companies", "Within radius", "Nearest companies"], horizontal=True, key=f"{key}_distance_mode")
+        if mode == "All companies":
+            return None, None
+        locations = load_locations()
+        if locations.empty:
+            st.info("No job locations available!")
+            return None, None
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            lat = st.number_input("Latitude", -90.0, 90.0, float(locations["company_lat"].mean()), format="%.5f", key=f"{key}_lat")
+        with col2:
+            long = st.number_input("Longitude", -180.0, 180.0, float(locations["company_long"].mean()), format="%.5f", key=f"{key}_long")
+        with col3:
+            if mode == "Nearest companies":
+                amount = st.number_input("Companies", min_value=1, value=20, step=1, key=f"{key}_k")
+            else:
+                amount = st.number_input("Radius (km)", min_value=0.1, value=15.0, step=1.0, key=f"{key}_radius")
+    index = location_index(hashed_id)
+    if mode == "Nearest companies":
+        return (mode, lat, long, amount), index.nearest(lat, long, int(amount))
+    return (mode, lat, long, amount), index.within(lat, long, amount)
 
 # Function to download CSV file
 def get_binary_file_downloader_html(bin_file, file_label='File'):
@@ -130,6 +435,12 @@ st.set_page_config(page_title="Job Listings Dashboard", page_icon="📌", layout
 query_params = st.query_params
 user_id = query_params.get("user_id")
 
+# Optional ?page=... deep link to open a page directly
+PAGES = ["Home", "View Listings", "Resume Analysis", "Geospatial Visualization"]
+start_page = query_params.get("page", "Home")
+if start_page not in PAGES:
+    start_page = "Home"
+
 # Sidebar Navigation
 # Sidebar Design
 # Sidebar Design
@@ -137,9 +448,9 @@ user_id = query_params.get("user_id")
 with st.sidebar:
     page = option_menu(
         menu_title="🔗 Navigation Menu",
-        options=["Home", "View Listings", "Resume Analysis", "Geospatial Visualization"],
+        options=PAGES,
         icons=["house", "list-task", "file-earmark-text", "globe2"],
-        default_index=0,
+        default_index=PAGES.index(start_page),
         menu_icon="🔗"
     )
 
@@ -151,6 +462,18 @@ st.sidebar.write("💡 **New:** You can now access the **Resume Analysis** tab t
 # ---------------- JOB LISTINGS PAGE ----------------
 st.session_state["user_id"] = user_id
 hashed_id = hash_id(user_id)
+
+# Trace this rerun when TRACING=1 or the session opted in with ?debug=1
+debug = query_params.get("debug") == "1"
+tracer.begin(enabled=TRACING or debug, page=page, user=hashed_id[:8])
+page_span = tracer.start(f"page {page}")
+
+# Warm the user's listings and locations while they look at the current page
+if user_id and PREFETCH:
+    start_prefetch(hashed_id)
+if user_id:
+    memory_budget.touch(hashed_id)
+
 if not user_id:
     st.title("🔒 Job Listings Dashboard")
     st.write("Please launch this dashboard from the Chrome extension to view your job listings.")
@@ -198,11 +521,7 @@ elif page == "Home":
     # Fetch Username
     if user_id:
         hashed_id = hash_id(user_id)
-        user_data = supabase.table("USER").select("user_name").eq("user_id", hashed_id).execute()
-        if user_data.data:
-            username = user_data.data[0]["user_name"]
-        else:
-            username = f"User {user_id}"
+        username = job_store.username(hashed_id) or f"User {user_id}"
     else:
         username = "Guest"
 
@@ -241,7 +560,7 @@ elif page == "Home":
     if st.button("Update Username"):
         print(hashed_id, new_username)
         if new_username:
-            response = supabase.table("USER").update({"user_name": new_username}).eq("user_id", hashed_id).execute()
+            response = job_store.update_username(hashed_id, new_username)
             print(response)
             if response:
                 st.success("Username updated successfully!")
@@ -261,85 +580,94 @@ elif page == "View Listings":
     col1, col2, col3 = st.columns([0.8, 1, 8])
     with col1:
         if st.button("🔄 Refresh Listings"):
+            await_prefetch(hashed_id, "jobs")
+            job_store.sync(hashed_id)
             st.rerun()
 
-    # Fetch jobs from Supabase
-    job_data = fetch_jobs(hashed_id)
+    # Fetch jobs from Supabase (usually already loaded by the session's prefetch)
+    await_prefetch(hashed_id, "jobs")
+    job_data = job_store.jobs(hashed_id)
 
     # Rename columns for proper capitalization
-    job_data.rename(columns={
+    listing_columns = {
         "job_title": "Position",
         "company_name": "Company",
         "job_skills_required": "Technical Requirements",
         "job_experience_level": "Experience",
         "job_url": "URL",
         "job_id": "Job ID"
-    }, inplace=True)
+    }
+    job_data.rename(columns=listing_columns, inplace=True)
+    # The skills text is only attached to the rows being shown or exported
+    export_data = lambda: job_store.jobs(hashed_id, skills=True).drop(columns="company_id").rename(columns=listing_columns)
 
+    # Export files are built in memory only when a download button is clicked
+    data_version = job_store.version(hashed_id)
     with col2:
-        csv = job_data.to_csv(index=False).encode('utf-8')
         st.download_button(
             label="📂 Download Listings (CSV)",
-            data=csv,
+            data=exports.loader(hashed_id, data_version, "csv", export_data),
             file_name=f'{user_id}_job_listings.csv',
-            mime='text/csv',
+            mime=CSV_MIME,
+            on_click="ignore",
         )
 
     with col3:
-        excel = job_data.to_excel("output.xlsx", index=False)
-        with open("output.xlsx", "rb") as file:
-            excel = file.read()
-            st.download_button(
-                label="📂 Download Listings (Excel)",
-                data=excel,
-                file_name=f'{user_id}_job_listings.xlsx',
-                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            )
+        st.download_button(
+            label="📂 Download Listings (Excel)",
+            data=exports.loader(hashed_id, data_version, "xlsx", export_data),
+            file_name=f'{user_id}_job_listings.xlsx',
+            mime=XLSX_MIME,
+            on_click="ignore",
+        )
 
     if not job_data.empty:
-        # Add Headers
-        header_col1, header_col2, header_col3, header_col4, header_col5, header_col6 = st.columns([2, 1, 5, 4, 1, 1.5])
-        with header_col1:
-            st.subheader("Position")
-        with header_col2:
-            st.subheader("Company")
-        with header_col3:
-            st.subheader("Technical Requirements")
-        with header_col4:
-            st.subheader("Experience")
-        with header_col5:
-            st.subheader("Job URL")
-        with header_col6:
-            st.subheader("Actions")
-
-        st.markdown("---")
-        # Display job listings
-        for index, row in job_data.iterrows():
-            col1, col2, col3, col4, col5, col6 = st.columns([2, 1, 5, 4, 1, 1.5])
-
-            with col1:
-                st.write(f"**{row['Position']}**")
-
-            with col2:
-                st.write(row['Company'])
-
-            with col3:
-                st.write(row['Technical Requirements'])
-
-            with col4:
-                st.write(row['Experience'])
-
-            with col5:
-                job_url = row["URL"]
-                st.markdown(f"[🔗 View Job]({job_url})", unsafe_allow_html=True)
-
-            with col6:
-                job_id = row["Job ID"]
-                if st.button("❌", key=job_id):
-                    delete_job(job_id)
-                    st.warning(f"Deleted job: {row['Position']}")
-                    st.rerun()
-            st.markdown("---")
+        # Full-text search and skill facets served from the user's inverted index
+        matches = search_filter(hashed_id, key="listings")
+        if matches is not None:
+            job_data = filter_frame(job_data, matches, column="Job ID")
+
+        # Optionally narrow the table to companies near a point
+        _, nearby = distance_filter(hashed_id, lambda: mappable_locations(job_locations(hashed_id)), key="listings")
+        if nearby is not None:
+            job_data = job_data[job_data["company_id"].isin(nearby["company_id"])]
+            st.caption(f"{len(job_data)} listings from {len(nearby)} nearby companies")
+        job_data = job_data.drop(columns="company_id")
+
+        # Reposts and near-identical listings are shown once, with a count of the hidden copies
+        duplicates = duplicate_index(hashed_id)
+        if duplicates.clusters() and st.toggle("Collapse near-duplicate listings", value=True, key="listings_collapse"):
+            kept, hidden = duplicates.collapse(job_data["Job ID"].tolist())
+            if hidden:
+                job_data = filter_frame(job_data, set(kept), column="Job ID")
+                job_data = job_data.assign(Similar=job_data["Job ID"].map(hidden).fillna(0).astype(int))
+                st.caption(f"{sum(hidden.values())} near-duplicate listings hidden")
+
+        layout = option_menu(
+            menu_title=None,
+            options=["Grid", "Cards"],
+            default_index=0,
+            icons=["table", "card-list"],
+            orientation="horizontal",
+            key="listings_layout",
+        )
+        # Only the current page is sent to the browser
+        page_number, page_size = pagination_controls(len(job_data), key="listings")
+        page_data = job_store.attach_skills(hashed_id, page_slice(job_data, page_number, page_size), id_column="Job ID", column="Technical Requirements")
+
+        if layout == "Grid":
+            # Selections are row positions, so they must not carry over to a differently filtered page
+            selected_ids = render_listings_grid(page_data, key=f"listings_grid_{page_number}_{page_size}_{hash(tuple(page_data['Job ID']))}")
+            if st.button(f"❌ Delete Selected ({len(selected_ids)})", disabled=not selected_ids):
+                job_store.delete_jobs(hashed_id, selected_ids)
+                st.warning(f"Deleted {len(selected_ids)} job(s)")
+                st.rerun()
+        else:
+            deleted_id = render_listings_cards(page_data)
+            if deleted_id:
+                job_store.delete_job(hashed_id, deleted_id)
+                st.warning(f"Deleted job: {deleted_id}")
+                st.rerun()
     else:
         st.info("No job listings available!")
 
@@ -382,114 +710,110 @@ elif page == "Resume Analysis":
         )
         if analysis_type == "Job Resume Similarity Score":
             if st.button("Upload & Analyze Resume"):
-                with st.spinner("Analyzing resume... This may take a few seconds."):
-                    # Read resume contents
-                    resume_contents = uploaded_file.read()
+                # Read resume contents
+                resume_contents = uploaded_file.getvalue()
+                results = st.empty()
+
+                # Instant local pre-ranking; the AI then only scores the top matches
+                ranked = rank_resume(resume_contents, hashed_id)
+                quick_match = ranked is not None and not ranked.empty
+                if quick_match:
+                    with results.container():
+                        render_similarity(ranked, f"Quick match of your top {len(ranked)} jobs (refining with AI...):")
+                    score_ids = ranked["job_id"].tolist()
+                else:
+                    score_ids = distinct_job_ids(hashed_id) if SIMILARITY_JOB_IDS else None  # Near-duplicate listings are scored once
 
+                with st.spinner("Analyzing resume... This may take a few seconds."):
                     # Call API to process resume
-                    result = process_resume(resume_contents, user_id)
-
-                    if result:
-                        # Convert API response into a DataFrame
-                        analysis_data = pd.DataFrame(result)  
-
-                        # Ensure correct column ordering & sorting by similarity score
-                        analysis_data = analysis_data[["position", "company", "similarity_score", "compatible_skills", "missing_skills"]]
-                        analysis_data = analysis_data.sort_values(by="similarity_score", ascending=False)
-
-                        # Display Table Headers
-                        st.write("Jobs sorted by highest similarity score:")
-
-                        header_col1, header_col2, header_col3, header_col4, header_col5 = st.columns([1, 1, 2, 3, 3])
-                        with header_col1:
-                            st.subheader("Position")
-                        with header_col2:
-                            st.subheader("Company")
-                        with header_col3:
-                            tooltip = '''# How is this score calculated?
-                
-    The similarity score is calculated using:
-    - BERT Similarity (Semantic meaning)
-    - TF-IDF Similarity (Keyword matching)
-    - Skill Compatibility Ratio
-
-    A higher score means a better job fit.
-    '''
-                            st.subheader("Similarity Score", help=tooltip)
-                        
-                        with header_col4:
-                            st.subheader("Compatible Skills")
-                        with header_col5:
-                            st.subheader("Missing Skills")
-
-                        # Display each job listing in structured columns
-                        for index, row in analysis_data.iterrows():
-                            col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 3, 3])
-
-                            with col1:
-                                st.write(f"**{row['position']}**")
-
-                            with col2:
-                                st.write(row['company'])
-
-                            with col3:
-                                similarity_score = f"{row['similarity_score']:.2%}"  # Convert to percentage
-                                st.write(f"🟢 {similarity_score}")  # Add emoji for visual effect
-
-                            with col4:
-                                compatible_skills = row["compatible_skills"] if row["compatible_skills"] else "None"
-                                st.write(compatible_skills)
-
-                            with col5:
-                                missing_skills = row["missing_skills"] if row["missing_skills"] else "None"
-                                st.write(missing_skills)
-                            
-                            st.markdown("---")
-
-                    else:
-                        st.error("❌ Failed to process resume. Please try again.")
+                    result = process_resume(resume_contents, user_id, score_ids)
+
+                if result:
+                    # Convert API response into a DataFrame
+                    with results.container():
+                        render_similarity(pd.DataFrame(result), "Jobs sorted by highest similarity score:")
+                elif quick_match:
+                    st.warning("⚠️ AI analysis is unavailable right now; showing the quick match scores.")
+                else:
+                    results.empty()
+                    st.error("❌ Failed to process resume. Please try again.")
 
         elif analysis_type == "Cover Letter Generation":
-            job_options = fetch_jobs(hashed_id)  # Fetch user's job listings
-            job_choice = st.selectbox("Select a job listing:", job_options["job_id"] + " - " + job_options["job_title"] + " @ " + job_options["company_name"])
+            await_prefetch(hashed_id, "jobs")
+            job_options = job_store.jobs(hashed_id)  # Fetch user's job listings
+            job_labels = dict(zip(job_options["job_id"], job_options["job_id"] + " - " + job_options["job_title"].astype(str) + " @ " + job_options["company_name"].astype(str)))
+            mode = st.radio("Generate for:", ["One job", "Several jobs"], horizontal=True)
+
+            if mode == "One job":
+                job_choice = st.selectbox("Select a job listing:", list(job_labels.values()))
 
-            if st.button("Generate Cover Letter"):
-                with st.spinner("Generating cover letter..."):
+                if st.button("Generate Cover Letter"):
                     job_id = job_choice.split(" - ")[0]
-                    cover_letter = generate_cover_letter(job_id, uploaded_file.read())  # API Call
+                    cover_letter_parts = []
+                    chunks = wait_for_first_chunk(generate_cover_letter(job_id, uploaded_file.getvalue(), cover_letter_parts), "Generating cover letter...")  # API Call
 
-                    if cover_letter:
+                    if chunks:
                         st.markdown("---")
                         st.subheader("**Generated Cover Letter:**")
-                        st.write_stream(stream_text(cover_letter))
-                        # Button to Download as DOCX
-                        docx_data = convert_to_docx(cover_letter)
-                        
-                        st.download_button("Download Cover Letter (DOCX)", docx_data, f"{job_id}_cover_letter.docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+                        st.write_stream(stream_text(chunks))
+                        # Button to Download as DOCX, built from the full streamed text
+                        docx_data = convert_to_docx("".join(cover_letter_parts))
+
+                        st.download_button("Download Cover Letter (DOCX)", docx_data, f"{job_id}_cover_letter.docx", DOCX_MIME)
 
                     else:
                         st.error("❌ Failed to generate cover letter. Try again.")
 
+            else:
+                job_ids = st.multiselect("Select job listings:", list(job_labels), format_func=job_labels.get)
+                # Results survive the reruns triggered by the download and retry buttons, but only
+                # for the resume and job selection they were generated from
+                resume_contents = uploaded_file.getvalue()
+                batch_key = (hashlib.sha256(resume_contents).hexdigest(), tuple(job_ids))
+                batch = st.session_state.get("cover_letter_batch")
+                if batch and batch["key"] != batch_key:
+                    batch = st.session_state["cover_letter_batch"] = None
+
+                if st.button(f"Generate {len(job_ids)} Cover Letters", disabled=not job_ids):
+                    docs, errors, archive = generate_cover_letter_batch(job_ids, job_labels, resume_contents)
+                    batch = st.session_state["cover_letter_batch"] = {"key": batch_key, "docs": docs, "errors": errors, "zip": archive.getvalue(), "count": archive.count}
+
+                if batch and batch["errors"] and st.button(f"🔁 Retry {len(batch['errors'])} Failed"):
+                    docs, errors, archive = generate_cover_letter_batch(list(batch["errors"]), job_labels, resume_contents, batch["docs"])
+                    batch = st.session_state["cover_letter_batch"] = {"key": batch_key, "docs": docs, "errors": errors, "zip": archive.getvalue(), "count": archive.count}
+
+                if batch:
+                    if batch["errors"]:
+                        st.warning(f"⚠️ {len(batch['errors'])} cover letter(s) failed: " + ", ".join(job_labels.get(j, j) for j in batch["errors"]))
+                    if batch["count"]:
+                        st.download_button(
+                            f"Download {batch['count']} Cover Letters (ZIP)",
+                            batch["zip"],
+                            f"{user_id}_cover_letters.zip",
+                            ZIP_MIME,
+                            on_click="ignore",
+                        )
+
         elif analysis_type == "Skills Recommendation":
             occupation = st.text_input("Enter the occupation you're interested in:")
 
             if st.button("Discover"):
                 if uploaded_file and occupation:
-                    with st.spinner("Fetching skills recommendations..."):
-                        resume_contents = uploaded_file.read()
-                        recommended_skills, context = recommend_skills(resume_contents, occupation)
-
-                        if recommended_skills:
-                            st.subheader("Here are the skills recommended for you:")
-                            st.write_stream(stream_text(recommended_skills))
-                            st.subheader("References: " )
-                            for c in context:
-                                title = c["title"]
-                                link = c["link"]
-                                st.markdown(f"[{title}]({link})", unsafe_allow_html=True)
-
-                        else:
-                            st.info("No specific skills recommendations found.")
+                    resume_contents = uploaded_file.getvalue()
+                    skills_parts, context = [], []
+                    chunks = wait_for_first_chunk(recommend_skills(resume_contents, occupation, skills_parts, context), "Fetching skills recommendations...")
+
+                    if chunks:
+                        st.subheader("Here are the skills recommended for you:")
+                        st.write_stream(stream_text(chunks))
+                        st.subheader("References: " )
+                        for c in context:
+                            title = c["title"]
+                            link = c["link"]
+                            st.markdown(f"[{title}]({link})", unsafe_allow_html=True)
+
+                    else:
+                        st.info("No specific skills recommendations found.")
                 else:
                     st.warning("Please upload your resume and specify an occupation.")
 
@@ -500,13 +824,10 @@ elif page == "Geospatial Visualization":
     st.title("Geospatial Visualization")
     st.caption("Visualize the locations of companies of your job listings on an interactive map!")
     st.markdown("---")
-    df = fetch_job_locations(hashed_id)
+    df = job_locations(hashed_id)
     missing_locations = df[df.isnull().any(axis=1)]["company_name"]
     print(missing_locations)
-    df = df.dropna()
-    filepath = "./job_locations.csv"
-    df.to_csv(filepath, index=False, sep=",")
-    center = [df["company_lat"].mean(), df["company_long"].mean()]
+    df = mappable_locations(df)
     visualization = option_menu(
             menu_title=None,
             options=["Points", "Heatmap"],
@@ -515,24 +836,16 @@ elif page == "Geospatial Visualization":
             menu_icon="toggles",
             orientation="horizontal",
         )
-    if visualization == "Points":
-        m = leafmap.Map(center=center, zoom=4)
-        m.add_points_from_xy(
-            filepath,
-            y="company_lat",
-            x="company_long",
-            layer_name="Job Locations",
-        )
-    elif visualization == "Heatmap":
-        m = leafmap.Map(center=center, zoom=4)
-        m.add_heatmap(
-            filepath,
-            latitude="company_lat",
-            longitude="company_long",
-            value="count",
-            name="Job Locations Heatmap",
-        )
-    m.to_streamlit(height=800)
+    distance_settings, nearby = distance_filter(hashed_id, lambda: df, key="geo")
+    if nearby is not None:
+        df = nearby
+    if df.empty:
+        st.info("No job locations available!")
+    else:
+        # Map HTML is built straight from the frame and reused until the user's jobs or the filter change
+        map_key = (hashed_id, job_store.version(hashed_id), visualization, distance_settings)
+        map_html = map_cache.get_or_set(map_key, lambda: build_map_html(df, visualization))
+        components.html(map_html, height=800)
     st.markdown("---")
     if not missing_locations.empty:
         st.subheader("Missing Locations")
@@ -541,4 +854,23 @@ elif page == "Geospatial Visualization":
             st.write(f"- {location}")
             
 
-    
\ No newline at end of file
+    
+
+# ---------------- DEBUG PANEL ----------------
+# Keep cached per-user data within the memory budget, never evicting the current user
+if user_id:
+    with tracer.span("memory.enforce"):
+        memory_budget.enforce(keep={hashed_id})
+page_span.finish()
+trace = tracer.end()
+if debug and trace:
+    with st.sidebar.expander("🛠️ Debug: Rerun Timings"):
+        st.caption(f"Trace {trace.id}")
+        st.dataframe(pd.DataFrame([span.to_dict() for span in trace.spans]), hide_index=True)
+        st.caption("Rolling timings (ms)")
+        st.dataframe(pd.DataFrame(tracer.stats()).T.round(2))
+        st.caption("Cached data vs. memory budget")
+        st.json(memory_budget.stats())
+        st.caption("Upstream calls vs. coalesced duplicates")
+        st.json({"db": job_store.flights.stats(), **{name: client.flights.stats() for name, client in backends.items()},
+                 **{f"{name} streams": client.stream_flights.stats() for name, client in backends.items()}})
@@ -0,0 +1,343 @@
+import base64
+import bisect
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import TTLCache
+from singleflight import Abandoned, SingleFlight
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Backend base URLs, overridable for local development (e.g. http://127.0.0.1:5000)
+JOB_BACKEND_URL = os.environ.get("JOB_BACKEND_URL", "https://job-scraper-backend-e616ed8dec66.herokuapp.com")
+SKILLS_BACKEND_URL = os.environ.get("SKILLS_BACKEND_URL", "https://job-skills-recommendation-b2836b73c13e.herokuapp.com")
+
+CONNECT_TIMEOUT = float(os.environ.get("BACKEND_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("BACKEND_READ_TIMEOUT", 120))
+MAX_RETRIES = int(os.environ.get("BACKEND_MAX_RETRIES", 3))
+# Seconds an identical POST's successful response is shared after it finishes (0: only while in
+# flight). Streams are only shared while in flight, so asking again generates a new answer.
+DEDUP_WINDOW = float(os.environ.get("BACKEND_DEDUP_WINDOW", 5))
+
+# Content-addressed resume transfer: HEAD/PUT {RESUME_PATH}/<sha256>, then {"resume_sha256": ...} in
+# request payloads instead of the base64 PDF. Set RESUME_UPLOAD=0 to always send resumes inline.
+RESUME_UPLOAD = os.environ.get("RESUME_UPLOAD", "1") == "1"
+RESUME_PATH = "/resumes"
+# Scoring a subset needs a job backend change: /get_similarity accepts an optional "job_ids" list and
+# scores only those of the user's saved jobs (every saved job without it). Backends without it
+# ignore the field and score everything, so the app only sends it with SIMILARITY_JOB_IDS=1.
+SIMILARITY_JOB_IDS = os.environ.get("SIMILARITY_JOB_IDS", "0") == "1"
+# How long an uploaded resume hash is trusted before checking the backend still has it
+RESUME_TTL = int(os.environ.get("RESUME_TTL", 3600))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Answer to a request referencing a resume hash the backend no longer has
+RESUME_GONE_STATUS = 410
+# Answers to a resume PUT from a backend without the transfer endpoints
+LEGACY_STATUSES = {404, 405, 501}
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def encode_pdf(pdf_bytes):
+    """Encodes PDF bytes into a JSON-serializable Base64 string."""
+    return base64.b64encode(pdf_bytes).decode("utf-8")
+
+
+class BackendError(Exception):
+    """Raised when a backend call fails after all retries."""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (bucket bounds in seconds)."""
+
+    BOUNDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+    def __init__(self, bounds=BOUNDS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last bucket is +inf
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentile(self, q):
+        """Upper bound of the bucket containing the q-th percentile (0-100)."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q / 100 * self.count
+            seen = 0
+            for bound, n in zip(self.bounds + (float("inf"),), self.counts):
+                seen += n
+                if seen >= rank:
+                    return bound
+            return float("inf")
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "buckets": dict(zip([str(b) for b in self.bounds] + ["inf"], self.counts)),
+        }
+
+
+class BackendClient:
+    """
+    JSON-over-HTTP client for one backend host.
+
+    Keeps a pooled keep-alive session, bounds every request with connect/read timeouts and
+    retries 429/5xx responses and connection errors with jittered exponential backoff. Identical
+    requests (same path and JSON body) are coalesced into one upstream call.
+
+    Resumes are sent by reference (`post_resume`/`stream_resume`): the PDF is uploaded once,
+    gzip-compressed, and later requests carry only its SHA-256. Backends without the upload
+    endpoints get the base64 PDF inline as before.
+    """
+
+    def __init__(self, base_url, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_retries=MAX_RETRIES, backoff=0.5, max_backoff=8.0, pool_size=10, sleep=time.sleep,
+                 dedup_window=DEDUP_WINDOW, resume_upload=RESUME_UPLOAD):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.latencies = {}
+        self.flights = SingleFlight("http", window=dedup_window)
+        self.stream_flights = SingleFlight("http stream")
+        self.resume_upload = resume_upload  # Turned off when the backend turns out not to support it
+        self.resumes = TTLCache(maxsize=256, ttl=RESUME_TTL)  # Hashes the backend is known to have
+        self._lock = threading.Lock()
+
+    def post(self, path, payload):
+        """POSTs `payload` as JSON to `path` and returns the decoded JSON body."""
+        body = _json_body(payload)
+        return self.flights.do(("POST", path, hashlib.sha256(body).hexdigest()), lambda: self._post(path, body))
+
+    def _post(self, path, body):
+        with tracer.span(f"http POST {path}", request_bytes=len(body)) as span:
+            response = self.request("POST", path, data=body, headers=JSON_HEADERS)
+            span.set(status=response.status_code, response_bytes=len(response.content))
+            try:
+                return response.json()
+            except ValueError as e:
+                raise BackendError(f"POST {path} returned invalid JSON", response.status_code) from e
+
+    def stream(self, path, payload):
+        """
+        POSTs `payload` and yields (event, data) pairs as the response arrives.
+
+        Server-sent events yield their event name (default "message") and data, plain chunked text
+        yields ("message", chunk), and a backend that answers with a single JSON body yields
+        ("json", body). Retries only happen before the first byte is received.
+        """
+        body = _json_body(payload)
+        try:
+            yield from self.stream_flights.stream((path, hashlib.sha256(body).hexdigest()), lambda: self._traced_stream(path, body))
+        except Abandoned as e:
+            raise BackendError(f"POST {path} stream interrupted: {e}") from e
+
+    def post_resume(self, path, payload, pdf_bytes):
+        """`post` with the resume added to `payload` by reference (or inline for legacy backends)."""
+        try:
+            return self.post(path, {**payload, **self.resume_ref(pdf_bytes)})
+        except BackendError as e:
+            if not self._resume_gone(e, pdf_bytes):
+                raise
+            return self.post(path, {**payload, **self.resume_ref(pdf_bytes)})
+
+    def stream_resume(self, path, payload, pdf_bytes):
+        """`stream` with the resume added to `payload` by reference (or inline for legacy backends)."""
+        started = False
+        try:
+            for item in self.stream(path, {**payload, **self.resume_ref(pdf_bytes)}):
+                started = True
+                yield item
+        except BackendError as e:
+            if started or not self._resume_gone(e, pdf_bytes):
+                raise
+            yield from self.stream(path, {**payload, **self.resume_ref(pdf_bytes)})
+
+    def resume_ref(self, pdf_bytes):
+        """Payload fields identifying a resume: its hash once the backend has the bytes, else the base64 PDF."""
+        if self.resume_upload:
+            digest = hashlib.sha256(pdf_bytes).hexdigest()
+            if digest in self.resumes:
+                return {"resume_sha256": digest}
+            try:
+                self.flights.do(("resume", digest), lambda: self.upload_resume(digest, pdf_bytes))
+                return {"resume_sha256": digest}
+            except BackendError as e:
+                if e.status_code not in LEGACY_STATUSES:
+                    raise
+                logger.info("%s has no resume upload endpoint, sending resumes inline", self.base_url)
+                self.resume_upload = False
+        return {"resume_contents": encode_pdf(pdf_bytes)}
+
+    def upload_resume(self, digest, pdf_bytes):
+        """Uploads the resume unless the backend already has it (HEAD), as gzip-compressed binary."""
+        path = f"{RESUME_PATH}/{digest}"
+        with tracer.span("http resume", size=len(pdf_bytes)) as span:
+            try:
+                self.request("HEAD", path, endpoint=RESUME_PATH)
+                span.set(uploaded=False)
+            except BackendError as e:
+                if e.status_code != 404:
+                    raise
+                body = gzip.compress(pdf_bytes, compresslevel=6)
+                headers = {"Content-Type": "application/pdf"}
+                if len(body) < len(pdf_bytes):
+                    headers["Content-Encoding"] = "gzip"
+                else:
+                    body = pdf_bytes  # Already-compressed PDF streams don't shrink
+                self.request("PUT", path, endpoint=RESUME_PATH, data=body, headers=headers)
+                span.set(uploaded=True, request_bytes=len(body))
+        self.resumes.set(digest, True)
+
+    def _resume_gone(self, error, pdf_bytes):
+        """True (and forgets the hash, so it is uploaded again) if the backend no longer has a referenced resume."""
+        if error.status_code != RESUME_GONE_STATUS or not self.resume_upload:
+            return False
+        self.resumes.invalidate(hashlib.sha256(pdf_bytes).hexdigest())
+        return True
+
+    def _traced_stream(self, path, body):
+        with tracer.span(f"http stream {path}", request_bytes=len(body)) as span:
+            start = time.perf_counter()
+            first_chunk, response_chars = True, 0
+            for event, data in self._stream(path, body):
+                if first_chunk:
+                    span.set(ttft_ms=round((time.perf_counter() - start) * 1000, 3))
+                    first_chunk = False
+                response_chars += len(data) if isinstance(data, str) else 0
+                span.set(response_chars=response_chars)
+                yield event, data
+
+    def _stream(self, path, body):
+        response = self.request("POST", path, data=body, headers=JSON_HEADERS, stream=True)
+        with response:
+            content_type = response.headers.get("Content-Type", "")
+            if content_type.startswith("application/json"):
+                try:
+                    yield "json", response.json()
+                except ValueError as e:
+                    raise BackendError(f"POST {path} returned invalid JSON", response.status_code) from e
+                return
+            response.encoding = response.encoding or "utf-8"
+            try:
+                if content_type.startswith("text/event-stream"):
+                    yield from _parse_sse(response.iter_lines(decode_unicode=True))
+                else:
+                    for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+                        if chunk:
+                            yield "message", chunk
+            except requests.RequestException as e:
+                raise BackendError(f"POST {path} stream interrupted: {e}") from e
+
+    def request(self, method, path, endpoint=None, **kwargs):
+        """Sends a request with retries; latencies are recorded under `endpoint` (default: the path)."""
+        url = self.base_url + path
+        endpoint = endpoint or path
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.ConnectionError as e:
+                # Connection failures are retried; read timeouts are not, as the backend may still be working
+                self._observe(endpoint, time.perf_counter() - start)
+                if attempt >= self.max_retries:
+                    raise BackendError(f"{method} {path} failed: {e}") from e
+                self.sleep(self._delay(attempt))
+                attempt += 1
+                continue
+            except requests.RequestException as e:
+                self._observe(endpoint, time.perf_counter() - start)
+                raise BackendError(f"{method} {path} failed: {e}") from e
+            self._observe(endpoint, time.perf_counter() - start)
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                response.close()  # Returns a streamed response's connection to the pool
+                self.sleep(self._delay(attempt, response.headers.get("Retry-After")))
+                attempt += 1
+                continue
+            if not 200 <= response.status_code < 300:
+                response.close()
+                raise BackendError(f"{method} {path} returned {response.status_code}", response.status_code)
+            return response
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass  # HTTP-date form, fall back to backoff
+        # Full jitter: uniform in [0, backoff * 2^attempt], capped
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _observe(self, path, seconds):
+        with self._lock:
+            histogram = self.latencies.get(path)
+            if histogram is None:
+                histogram = self.latencies[path] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def latency_stats(self):
+        """Per-endpoint latency histogram snapshots."""
+        return {path: histogram.snapshot() for path, histogram in self.latencies.items()}
+
+    def close(self):
+        self.session.close()
+
+
+def _json_body(payload):
+    """Serializes a payload with sorted keys, so equal payloads hash (and coalesce) alike."""
+    return json.dumps(payload, sort_keys=True).encode("utf-8")
+
+
+def _parse_sse(lines):
+    """Parses server-sent event lines into (event, data) pairs."""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            # Blank line terminates an event
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            continue  # Comment / keep-alive
+        else:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+    if data:
+        yield event, "\n".join(data)
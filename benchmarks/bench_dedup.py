@@ -0,0 +1,83 @@
+"""
+Near-duplicate detection benchmark.
+
+Seeds synthetic listings, adds reposts of 10% of them (half exact copies, half with one
+requirement line dropped), then times signature building and clustering, an incremental add of 1%
+more jobs and a relink after deleting 1%. Recall counts reposts clustered with their original.
+The last column is the mean exact Jaccard similarity of each flagged job and its representative.
+
+    python benchmarks/bench_dedup.py [--jobs 1000 10000 50000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+import memory_db  # noqa: E402
+from dedup import DuplicateIndex, features  # noqa: E402
+
+
+def reposts(jobs, share, suffix, seed):
+    """Copies of a sample of jobs under new IDs; every other copy loses its last requirement line."""
+    copies = jobs.sample(max(int(len(jobs) * share), 1), random_state=seed).copy()
+    originals = copies["job_id"].tolist()
+    copies["job_id"] = copies["job_id"] + suffix
+    copies.iloc[::2, copies.columns.get_loc("job_skills_required")] = [
+        "\n".join(text.splitlines()[:-1]) for text in copies["job_skills_required"].iloc[::2]
+    ]
+    return copies, dict(zip(copies["job_id"], originals))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'jobs':>8}{'build (ms)':>12}{'cluster (ms)':>14}{'add 1% (ms)':>13}{'delete 1% (ms)':>16}{'KiB':>8}{'recall':>8}{'flagged':>9}{'jaccard':>9}")
+    for n in args.jobs:
+        client = memory_db.MemoryClient()
+        user = f"bench{n:08d}"
+        memory_db.seed_synthetic(client, user, n, seed=n)
+        jobs = db.fetch_jobs(client, user)
+        copies, original_of = reposts(jobs, 0.1, "-repost", seed=0)
+        jobs = pd.concat([jobs, copies], ignore_index=True)
+
+        start = time.perf_counter()
+        index = DuplicateIndex().sync(jobs, 1)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        clusters = index.clusters()
+        cluster = time.perf_counter() - start
+
+        recall = np.mean([clusters.get(copy) is not None and clusters.get(copy) == clusters.get(original) for copy, original in original_of.items()])
+        by_id = jobs.set_index("job_id")
+        rows = by_id[["job_title", "company_name", "job_skills_required"]].itertuples(name=None)
+        feature_sets = {job_id: features(*values) for job_id, *values in rows}
+        flagged = index.duplicates()
+        jaccard = np.mean([len(feature_sets[job_id] & feature_sets[clusters[job_id]]) / len(feature_sets[job_id] | feature_sets[clusters[job_id]]) for job_id in flagged])
+
+        more, _ = reposts(jobs, 0.01, "-new", seed=1)
+        start = time.perf_counter()
+        index.sync(pd.concat([jobs, more], ignore_index=True), 2)
+        index.clusters()
+        add = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index.sync(jobs.sample(frac=0.99, random_state=2), 3)
+        index.clusters()
+        delete = time.perf_counter() - start
+
+        print(f"{len(jobs):>8}{build * 1000:>12.1f}{cluster * 1000:>14.1f}{add * 1000:>13.1f}{delete * 1000:>16.1f}"
+              f"{index.nbytes() / 1024:>8.0f}{recall:>8.1%}{len(flagged):>9}{jaccard:>9.2f}")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Render-time benchmark for the View Listings layouts.
+
+Renders synthetic listings with Streamlit's AppTest harness and reports the time per
+render for the paginated grid, one paginated card page, and the old all-rows card layout.
+
+    python benchmarks/bench_listings.py [--sizes 100 1000 10000] [--repeat 3] [--skip-full]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def listings_page(n, layout, root):
+    import sys
+    sys.path.insert(0, root)
+
+    import pandas as pd
+    from listings import page_slice, render_listings_cards, render_listings_grid
+
+    job_data = pd.DataFrame({
+        "Position": [f"Software Engineer {i}" for i in range(n)],
+        "Company": [f"Company {i % 50}" for i in range(n)],
+        "Technical Requirements": ["- Java: Spring Boot\n- Git: version control\n- SQL: PostgreSQL"] * n,
+        "Experience": ["Entry level"] * n,
+        "URL": [f"https://www.linkedin.com/jobs/view/{i}" for i in range(n)],
+        "Job ID": [str(i) for i in range(n)],
+    })
+    if layout == "grid":
+        render_listings_grid(page_slice(job_data, 1, 50))
+    elif layout == "cards":
+        render_listings_cards(page_slice(job_data, 1, 50))
+    else:
+        render_listings_cards(job_data)
+
+
+def time_render(n, layout, repeat):
+    timings = []
+    for _ in range(repeat):
+        at = AppTest.from_function(listings_page, args=(n, layout, ROOT), default_timeout=600)
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-full", action="store_true", help="skip the old all-rows layout (slow at 10k)")
+    args = parser.parse_args()
+
+    layouts = ["grid", "cards"] + ([] if args.skip_full else ["full"])
+    time_render(10, "grid", 1)  # Warm up imports
+    print(f"{'listings':>10}" + "".join(f"{layout + ' (ms)':>14}" for layout in layouts))
+    for n in args.sizes:
+        row = [time_render(n, layout, args.repeat) * 1000 for layout in layouts]
+        print(f"{n:>10}" + "".join(f"{ms:>14.1f}" for ms in row))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
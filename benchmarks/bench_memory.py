@@ -0,0 +1,109 @@
+"""
+Memory benchmark for concurrent sessions.
+
+Opens View Listings for many synthetic users, keeping every AppTest session alive, against the
+in-memory data backend. Each budget runs in a fresh interpreter. The report shows process RSS growth,
+the cached per-user data the memory budget accounts for, how many users were evicted and how big one
+user's listings are as a plain frame vs. the compact store.
+
+    python benchmarks/bench_memory.py [--sessions 100] [--jobs 500] [--budgets 0 32]
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+
+
+def rss_bytes():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def worker(args):
+    os.environ.update(DATA_BACKEND="memory", HASH_SECRET="benchmark-secret", TRACE_FILE="", PREFETCH="0",
+                      MEMORY_BUDGET_MB=str(args.budget), JOB_BACKEND_URL="http://127.0.0.1:9", SKILLS_BACKEND_URL="http://127.0.0.1:9")
+    os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+    sys.path.insert(0, ROOT)
+    import contextlib
+    import hashlib
+    import hmac
+    import io
+
+    import numpy as np
+    from streamlit.testing.v1 import AppTest
+
+    import db
+    import memory_db
+    from memory import estimate_bytes
+
+    client = memory_db.shared_client()
+    users = [f"memory-{i}" for i in range(args.sessions)]
+    for i, user_id in enumerate(users):
+        hashed_id = hmac.new(b"benchmark-secret", user_id.encode(), hashlib.sha256).hexdigest()
+        memory_db.seed_synthetic(client, hashed_id, args.jobs, seed=i)
+
+    # One user's listings: as fetched vs. compacted (categoricals, skills text moved to the pool)
+    frame = db.fetch_jobs(client, hashed_id)
+    store = db.JobStore(client)
+    store.jobs(hashed_id)
+    plain, compact, skills = estimate_bytes(frame), estimate_bytes(store.cache.peek((hashed_id, "jobs"))), store.skills.nbytes
+
+    def render(user_id):
+        at = AppTest.from_file(APP, default_timeout=600)
+        at.query_params.update(user_id=user_id, page="View Listings", debug="1")
+        with contextlib.redirect_stdout(io.StringIO()):
+            at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return at
+
+    render(users[0])  # Warm up imports
+    gc.collect()
+    baseline = rss_bytes()
+    sessions, timings = [], []
+    for user_id in users:
+        start = time.perf_counter()
+        sessions.append(render(user_id))
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    budget = next(stats for stats in (json.loads(element.value) for element in sessions[-1].json) if "limit" in stats)
+    print(json.dumps({
+        "rss_growth": rss_bytes() - baseline,
+        "cached": budget["usage"],
+        "users": budget["users"],
+        "evictions": budget["evictions"],
+        "p50_ms": float(np.percentile(timings, 50)) * 1000,
+        "plain": plain,
+        "compact": compact + skills,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0, 32], help="MiB; 0 disables eviction")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--budget", type=float, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return worker(args)
+
+    print(f"{'budget (MiB)':>12}{'sessions':>10}{'RSS +MiB':>10}{'cached MiB':>12}{'users':>7}{'evicted':>9}{'p50 (ms)':>10}")
+    for budget in args.budgets:
+        command = [sys.executable, __file__, "--worker", "--budget", str(budget), "--sessions", str(args.sessions), "--jobs", str(args.jobs)]
+        result = json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1])
+        print(f"{budget or 'off':>12}{args.sessions:>10}{result['rss_growth'] / 2 ** 20:>10.1f}{result['cached'] / 2 ** 20:>12.1f}"
+              f"{result['users']:>7}{result['evictions']:>9}{result['p50_ms']:>10.1f}")
+        sys.stdout.flush()
+    print(f"\nOne user's {args.jobs} listings: {result['plain'] / 2 ** 10:.0f} KiB as fetched, {result['compact'] / 2 ** 10:.0f} KiB compacted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+End-to-end page latency and memory benchmark.
+
+Drives app.py through Streamlit's AppTest harness against the in-memory data backend
+(DATA_BACKEND=memory), with one synthetic user per listing count. For every page it reports the
+cold render (empty caches), p50/p95 of warm reruns and the peak traced memory of the cold render.
+
+    python benchmarks/bench_pages.py [--jobs 10 1000 10000 100000] [--repeat 5] [--pages ...]
+"""
+import argparse
+import contextlib
+import hashlib
+import hmac
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(ROOT, "app.py")
+PAGES = ["Home", "View Listings", "Resume Analysis", "Geospatial Visualization"]
+
+os.environ["DATA_BACKEND"] = "memory"
+os.environ.setdefault("STREAMLIT_LOGGER_LEVEL", "error")
+os.environ.setdefault("HASH_SECRET", "benchmark-secret")
+# Nothing on these pages calls the AI backends without an upload, but never point a benchmark at production
+os.environ.setdefault("JOB_BACKEND_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SKILLS_BACKEND_URL", "http://127.0.0.1:9")
+sys.path.insert(0, ROOT)
+
+import streamlit as st  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import memory_db  # noqa: E402
+
+
+def hash_id(user_id):
+    # Same as app.hash_id
+    return hmac.new(os.environ["HASH_SECRET"].encode(), user_id.encode(), hashlib.sha256).hexdigest()
+
+
+def render(user_id, page):
+    at = AppTest.from_file(APP, default_timeout=600)
+    at.query_params["user_id"] = user_id
+    at.query_params["page"] = page
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # The app prints debug output
+        at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"{page} failed: {at.exception[0].message}")
+    return elapsed
+
+
+def measure(user_id, page, repeat):
+    # Cold: empty process-wide caches, so the data layer hits the backend
+    st.cache_resource.clear()
+    cold = render(user_id, page)
+
+    # Peak memory of another cold render (traced separately, tracing slows execution down)
+    st.cache_resource.clear()
+    tracemalloc.start()
+    render(user_id, page)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    render(user_id, page)  # Re-warm after the traced run
+    warm = [render(user_id, page) for _ in range(repeat)]
+    return cold, np.percentile(warm, 50), np.percentile(warm, 95), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[10, 1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--pages", nargs="+", default=PAGES, choices=PAGES)
+    args = parser.parse_args()
+
+    client = memory_db.shared_client()
+    users = {}
+    for n in args.jobs:
+        user_id = f"benchmark-{n}"
+        memory_db.seed_synthetic(client, hash_id(user_id), n, seed=n)
+        users[n] = user_id
+
+    render(users[args.jobs[0]], "Home")  # Warm up imports
+    print(f"{'page':<26}{'jobs':>8}{'cold (ms)':>12}{'p50 (ms)':>11}{'p95 (ms)':>11}{'peak (MiB)':>12}")
+    for page in args.pages:
+        for n in args.jobs:
+            cold, p50, p95, peak = measure(users[n], page, args.repeat)
+            print(f"{page:<26}{n:>8}{cold * 1000:>12.1f}{p50 * 1000:>11.1f}{p95 * 1000:>11.1f}{peak / 2 ** 20:>12.1f}")
+            sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Local resume ranking benchmark.
+
+Builds the TF-IDF/skill index over synthetic listings, then times full ranking of a resume and
+an incremental update after deleting and re-adding jobs.
+
+    python benchmarks/bench_ranking.py [--jobs 1000 10000 100000] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import db  # noqa: E402
+import memory_db  # noqa: E402
+from ranking import RankingIndex  # noqa: E402
+
+RESUME = """
+Software engineer with five years of Python, SQL and Java. Built REST APIs with Spring Boot and
+Django, deployed with Docker and Kubernetes on AWS, and maintained CI/CD pipelines in GitLab.
+Worked on Kafka streaming, PostgreSQL tuning and React front-ends.
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--top-k", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'jobs':>8}{'build (ms)':>12}{'rank p50':>10}{'rank p95':>10}{'all p50':>10}{'update (ms)':>13}")
+    for n in args.jobs:
+        client = memory_db.MemoryClient()
+        user = f"bench{n:08d}"
+        memory_db.seed_synthetic(client, user, n, seed=n)
+        jobs = db.fetch_jobs(client, user)
+
+        start = time.perf_counter()
+        index = RankingIndex().sync(jobs)
+        build = time.perf_counter() - start
+
+        index.score(RESUME, args.top_k)  # Computes IDF and norms
+        top = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.score(RESUME, args.top_k)
+            top.append(time.perf_counter() - start)
+        full = []
+        for _ in range(max(args.repeat // 4, 1)):
+            start = time.perf_counter()
+            index.score(RESUME)
+            full.append(time.perf_counter() - start)
+
+        # Delete 1% of the jobs and add them back, then rank again
+        changed = jobs.sample(max(n // 100, 1), random_state=0)
+        start = time.perf_counter()
+        index.sync(jobs.drop(changed.index))
+        index.sync(jobs)
+        index.score(RESUME, args.top_k)
+        update = time.perf_counter() - start
+
+        print(f"{n:>8}{build * 1000:>12.1f}{np.percentile(top, 50) * 1000:>10.1f}{np.percentile(top, 95) * 1000:>10.1f}"
+              f"{np.percentile(full, 50) * 1000:>10.1f}{update * 1000:>13.1f}")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Resume transfer benchmark against the local stub backend.
+
+Runs one resume analysis session (similarity, cover letters, skills recommendation) with the resume
+sent inline as base64 JSON and by content hash, and reports the request bytes the backend
+received and the wall time. Uses a synthetic uncompressed text PDF unless --pdf is given.
+
+    python benchmarks/bench_resume_upload.py [--pdf resume.pdf] [--size-kb 512] [--cover-letters 5]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from backend import BackendClient  # noqa: E402
+from stub_backend import serve  # noqa: E402
+
+WORDS = "java python spring kubernetes team lead delivered migrated platform customers reduced latency".split()
+
+
+def synthetic_pdf(size):
+    """A single-page PDF with an uncompressed text stream of about `size` bytes."""
+    rng = random.Random(0)
+    lines, total = [], 0
+    while total < size:
+        line = f"({' '.join(rng.choice(WORDS) for _ in range(12))}) Tj T*"
+        lines.append(line)
+        total += len(line) + 1
+    stream = "BT /F1 10 Tf 12 TL 72 720 Td\n" + "\n".join(lines) + "\nET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R >>",
+        f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream",
+    ]
+    body = "%PDF-1.4\n" + "".join(f"{i} 0 obj\n{obj}\nendobj\n" for i, obj in enumerate(objects, 1))
+    return (body + "trailer\n<< /Root 1 0 R >>\n%%EOF\n").encode("latin-1")
+
+
+def session(client, pdf, cover_letters):
+    client.post_resume("/get_similarity", {"user_id": "benchmark", "job_ids": list(range(20))}, pdf)
+    for job_id in range(cover_letters):
+        list(client.stream_resume("/generate_cover_letter", {"job_id": job_id, "stream": True}, pdf))
+    list(client.stream_resume("/get_skills_recommendation", {"job_occupation": "Engineer", "stream": True}, pdf))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdf", help="resume PDF to send (default: synthetic)")
+    parser.add_argument("--size-kb", type=int, default=512, help="synthetic PDF size")
+    parser.add_argument("--cover-letters", type=int, default=5)
+    args = parser.parse_args()
+    if args.pdf:
+        with open(args.pdf, "rb") as f:
+            pdf = f.read()
+    else:
+        pdf = synthetic_pdf(args.size_kb * 1024)
+
+    print(f"Resume: {len(pdf) / 1024:.0f} KiB, {args.cover_letters + 2} calls per session")
+    print(f"{'transfer':>10}{'sent KiB':>10}{'upload KiB':>12}{'time (ms)':>11}")
+    for label, upload in (("inline", False), ("by hash", True)):
+        server, state = serve()
+        client = BackendClient(f"http://127.0.0.1:{server.server_port}", dedup_window=0, resume_upload=upload)
+        start = time.perf_counter()
+        session(client, pdf, args.cover_letters)
+        elapsed = time.perf_counter() - start
+        stats = state.stats()["request_bytes"]
+        print(f"{label:>10}{sum(stats.values()) / 1024:>10.1f}{stats.get('/resumes/', 0) / 1024:>12.1f}{elapsed * 1000:>11.1f}")
+        client.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold-start benchmark for the Streamlit entry point.
+
+Each measurement runs in a fresh interpreter, like a restarted dyno. For every page it reports
+the first-render latency of app.py (Streamlit itself already imported) and which heavy
+dependencies that render pulled in; it also reports each dependency's standalone import time.
+
+    python benchmarks/bench_startup.py [--repeat 3] [--jobs 1000]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["Home", "View Listings", "Resume Analysis", "Geospatial Visualization"]
+HEAVY_MODULES = ["pandas", "numpy", "requests", "supabase", "docx", "leafmap.foliumap"]
+
+FIRST_RENDER = r"""
+import hashlib, hmac, json, os, sys, time
+os.environ.update(DATA_BACKEND="memory", HASH_SECRET="benchmark-secret", TRACE_FILE="",
+                  JOB_BACKEND_URL="http://127.0.0.1:9", SKILLS_BACKEND_URL="http://127.0.0.1:9")
+sys.path.insert(0, {root!r})
+from streamlit.testing.v1 import AppTest
+
+start = time.perf_counter()
+import memory_db
+user = hmac.new(b"benchmark-secret", b"startup", hashlib.sha256).hexdigest()
+memory_db.seed_synthetic(memory_db.shared_client(), user, {jobs})
+seed = time.perf_counter() - start
+
+at = AppTest.from_file(os.path.join({root!r}, "app.py"), default_timeout=600)
+at.query_params.update(user_id="startup", page={page!r})
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+loaded = [m for m in {modules!r} if m in sys.modules]
+print(json.dumps({{"ms": elapsed * 1000, "loaded": loaded, "error": [e.message for e in at.exception]}}))
+"""
+
+IMPORT_TIME = r"""
+import json, time
+start = time.perf_counter()
+try:
+    import {module}
+except ImportError:
+    print(json.dumps({{"ms": None}}))
+else:
+    print(json.dumps({{"ms": (time.perf_counter() - start) * 1000}}))
+"""
+
+
+def run(code):
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jobs", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'dependency':<20}{'import (ms)':>12}")
+    for module in HEAVY_MODULES:
+        timings = [run(IMPORT_TIME.format(module=module))["ms"] for _ in range(args.repeat)]
+        if None in timings:
+            print(f"{module:<20}{'not installed':>12}")
+        else:
+            print(f"{module:<20}{statistics.median(timings):>12.1f}")
+
+    print()
+    print(f"{'page':<26}{'first render (ms)':>18}  loaded")
+    for page in PAGES:
+        results = [run(FIRST_RENDER.format(root=ROOT, page=page, jobs=args.jobs, modules=HEAVY_MODULES)) for _ in range(args.repeat)]
+        if results[0]["error"]:
+            raise RuntimeError(f"{page} failed: {results[0]['error']}")
+        print(f"{page:<26}{statistics.median(r['ms'] for r in results):>18.1f}  {', '.join(results[0]['loaded'])}")
+
+
+if __name__ == "__main__":
+    main()
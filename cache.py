@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire `ttl` seconds after they are stored.
+
+    Expired entries stay readable through `peek` until they are overwritten or evicted. With a
+    `sizeof` function, the estimated size of each stored value is kept in `nbytes`.
+    """
+
+    def __init__(self, maxsize=128, ttl=300, timer=time.monotonic, sizeof=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self._data = OrderedDict()  # key -> (expires_at, value), oldest first
+        self._sizes = {}  # key -> estimated bytes, when sizeof is set
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > self.timer():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        self.set_many([(key, value)])
+
+    def set_many(self, items):
+        """Stores several (key, value) pairs under one lock acquisition."""
+        with self._lock:
+            expires_at = self.timer() + self.ttl
+            for key, value in items:
+                self._data[key] = (expires_at, value)
+                self._data.move_to_end(key)
+                if self.sizeof is not None:
+                    size = self.sizeof(value)
+                    self.nbytes += size - self._sizes.get(key, 0)
+                    self._sizes[key] = size
+            while len(self._data) > self.maxsize:
+                key, _ = self._data.popitem(last=False)
+                self.nbytes -= self._sizes.pop(key, 0)
+                self.evictions += 1
+
+    def resize(self, key):
+        """Re-estimates the size of a value that was mutated in place."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.sizeof is not None:
+                size = self.sizeof(entry[1])
+                self.nbytes += size - self._sizes.get(key, 0)
+                self._sizes[key] = size
+
+    def peek(self, key, default=None):
+        """Returns the stored value even if it has expired, without touching LRU order or counters."""
+        with self._lock:
+            entry = self._data.get(key)
+            return default if entry is None else entry[1]
+
+    def get_or_set(self, key, loader):
+        """Returns the cached value for `key`, calling `loader()` and storing its result on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self.nbytes -= self._sizes.pop(key, 0)
+
+    def invalidate_where(self, predicate):
+        """Drops every entry whose key satisfies `predicate`."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+                self.nbytes -= self._sizes.pop(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "nbytes": self.nbytes,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and entry[0] > self.timer()
+
+    def __len__(self):
+        return len(self._data)
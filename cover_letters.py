@@ -0,0 +1,118 @@
+"""
+Batch cover letter generation.
+
+`generate_batch` fans a set of jobs out over a bounded thread pool. Each worker fetches one cover
+letter and builds its DOCX, and failed jobs are retried on their own without aborting the rest.
+Progress events are reported back to the caller's thread, because Streamlit elements can only be
+updated from the script thread.
+"""
+import contextvars
+import io
+import logging
+import os
+import queue
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from backend import BackendError
+from tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Concurrent cover letter requests per batch (the backend client pools 10 connections)
+WORKERS = int(os.environ.get("COVER_LETTER_WORKERS", 4))
+# Extra attempts per failed job, each after the whole batch has been tried once
+RETRIES = int(os.environ.get("COVER_LETTER_RETRIES", 2))
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+ZIP_MIME = "application/zip"
+
+
+def fetch_cover_letter(backend, job_id, resume_bytes):
+    """Full cover letter text for one job; raises BackendError on failure or an empty letter."""
+    parts = []
+    for event, data in backend.stream_resume("/generate_cover_letter", {"job_id": job_id, "stream": True}, resume_bytes):
+        if event == "json":
+            data = data.get("cover_letter") or ""  # Backend without streaming support
+        elif event != "message":
+            continue
+        if data:
+            parts.append(data)
+    if not parts:
+        raise BackendError(f"Empty cover letter for job {job_id}")
+    return "".join(parts)
+
+
+def build_docx(cover_letter):
+    """DOCX file bytes with the cover letter as a single paragraph."""
+    from docx import Document  # Only needed once a cover letter is generated
+    docx_data = io.BytesIO()
+    docx = Document()
+    docx.add_paragraph(cover_letter)
+    docx.save(docx_data)
+    return docx_data.getvalue()
+
+
+def _work(events, backend, job_id, resume_bytes, attempt):
+    events.put((job_id, "generating", attempt, None))
+    try:
+        with tracer.span("cover_letter.batch_item", job_id=job_id, attempt=attempt):
+            docx = build_docx(fetch_cover_letter(backend, job_id, resume_bytes))
+    except Exception as e:  # Any failure only affects this job
+        logger.warning("Cover letter for job %s failed (attempt %s): %s", job_id, attempt, e)
+        events.put((job_id, "failed", attempt, str(e)))
+    else:
+        events.put((job_id, "done", attempt, docx))
+
+
+def generate_batch(backend, job_ids, resume_bytes, workers=WORKERS, retries=RETRIES, backoff=1.0):
+    """
+    Yields (job_id, status, attempt, payload) events while generating cover letters concurrently.
+
+    Statuses are "generating", "retrying", "done" (payload: DOCX bytes) and "failed" (payload:
+    error message; final only once a job has no attempts left, i.e. when its attempt == retries).
+    """
+    events = queue.Queue()
+    pending = list(dict.fromkeys(job_ids))
+    pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending) or 1)), thread_name_prefix="cover-letter")
+    try:
+        for attempt in range(retries + 1):
+            if not pending:
+                break
+            if attempt:
+                time.sleep(backoff * attempt)
+                for job_id in pending:
+                    yield job_id, "retrying", attempt, None
+            for job_id in pending:
+                # Copy the context so spans land in the current rerun's trace
+                pool.submit(contextvars.copy_context().run, _work, events, backend, job_id, resume_bytes, attempt)
+            failed, outstanding = [], len(pending)
+            while outstanding:
+                job_id, status, item_attempt, payload = events.get()
+                if status != "generating":
+                    outstanding -= 1
+                if status == "failed":
+                    failed.append(job_id)
+                yield job_id, status, item_attempt, payload
+            pending = failed
+    finally:
+        # Streamlit drops the generator when a widget triggers a rerun mid-batch; don't block that
+        # rerun on the queued jobs (running ones finish in the background)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ZipBuilder:
+    """Builds a ZIP archive in memory as files arrive."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+        self.archive = zipfile.ZipFile(self.buffer, "w", compression=zipfile.ZIP_DEFLATED)
+        self.count = 0
+
+    def add(self, name, data):
+        self.archive.writestr(name, data)
+        self.count += 1
+
+    def getvalue(self):
+        self.archive.close()
+        return self.buffer.getvalue()
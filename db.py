@@ -0,0 +1,329 @@
+import hashlib
+import os
+import sys
+
+import pandas as pd
+
+from cache import TTLCache
+from memory import estimate_bytes
+from singleflight import SingleFlight
+from tracing import traced
+
+JOB_COLUMNS = ["job_title", "job_skills_required", "job_experience_level", "job_url", "job_id", "company_name", "company_id"]
+LOCATION_COLUMNS = ["company_id", "company_name", "company_long", "company_lat", "company_address", "count"]
+# Seconds a finished query's result is shared with identical calls (0: only while in flight)
+DEDUP_WINDOW = float(os.environ.get("DB_DEDUP_WINDOW", 1))
+# Low-cardinality listing columns stored as categoricals
+CATEGORY_COLUMNS = ["job_title", "job_experience_level", "company_name", "company_id"]
+# Long free text kept out of the cached listing frames and attached only where it is used
+SKILLS_COLUMN = "job_skills_required"
+
+# Rows per request; PostgREST caps unpaginated responses, so every listing query is paged
+PAGE_SIZE = 1000
+# Job IDs per `in` filter, to keep request URLs short
+ID_BATCH_SIZE = 200
+
+
+def _job_select(columns):
+    """Builds the JOB select string for `columns` (company_name comes from the COMPANY join)."""
+    fields = ["COMPANY!inner(company_name)" if column == "company_name" else column for column in columns]
+    if "job_id" not in columns:
+        fields.append("job_id")  # Needed for the keyset
+    return ", ".join(fields + ["USER_JOB!inner(user_id)"])
+
+
+def _flatten(records):
+    """Builds a frame from JOB records, expanding the embedded COMPANY dict into plain columns."""
+    df = pd.DataFrame.from_records(records)
+    if "COMPANY" in df:
+        company = pd.DataFrame.from_records(df.pop("COMPANY").tolist(), index=df.index)
+        df[company.columns] = company
+    return df
+
+
+def _jobs_frame(records, columns):
+    if not records:
+        return pd.DataFrame(columns=columns)  # Empty Table
+    return _flatten(records)[columns]
+
+
+def _paged(build_query, after=None, limit=PAGE_SIZE):
+    """Yields pages of rows from `build_query()`, ordered and keyed on job_id."""
+    while True:
+        query = build_query()
+        if after is not None:
+            query = query.gt("job_id", after)
+        records = query.order("job_id").limit(limit).execute().data or []
+        if records:
+            yield records
+        if len(records) < limit:
+            return
+        after = records[-1]["job_id"]
+
+
+# Function to create the data client selected by DATA_BACKEND ("supabase" or the in-memory "memory" stand-in)
+def create_data_client():
+    backend = os.environ.get("DATA_BACKEND", "supabase")
+    if backend == "memory":
+        from memory_db import shared_client
+        return shared_client()
+    if backend != "supabase":
+        raise ValueError(f"Unknown DATA_BACKEND: {backend}")
+    from supabase import create_client
+    return create_client(os.environ.get("SUPABASE_URL"), os.environ.get("SUPABASE_KEY"))
+
+
+# Function to fetch job data
+@traced("db.fetch_jobs", size=len)
+def fetch_jobs(client, hashed_id, columns=JOB_COLUMNS):
+    select = _job_select(columns)
+    records = [record for page in _paged(lambda: client.table("JOB").select(select).eq("USER_JOB.user_id", hashed_id)) for record in page]
+    return _jobs_frame(records, columns)
+
+
+# Function to fetch specific jobs of a user by ID
+@traced("db.fetch_jobs_by_id", size=len)
+def fetch_jobs_by_id(client, hashed_id, job_ids, columns=JOB_COLUMNS):
+    job_ids = list(job_ids)
+    select = _job_select(columns)
+    records = []
+    for i in range(0, len(job_ids), ID_BATCH_SIZE):
+        response = client.table("JOB").select(select).eq("USER_JOB.user_id", hashed_id).in_("job_id", job_ids[i:i + ID_BATCH_SIZE]).execute()
+        records.extend(response.data or [])
+    return _jobs_frame(records, columns)
+
+
+# Function to fetch just the IDs of a user's saved jobs
+@traced("db.fetch_job_ids", size=len)
+def fetch_job_ids(client, hashed_id):
+    pages = _paged(lambda: client.table("USER_JOB").select("job_id").eq("user_id", hashed_id))
+    return [record["job_id"] for page in pages for record in page]
+
+
+def merge_jobs(jobs, added, removed_ids):
+    """Applies an incremental sync to a cached listings frame."""
+    kept = jobs[~jobs["job_id"].isin(removed_ids)]
+    if added.empty:
+        return kept.reset_index(drop=True)
+    return pd.concat([kept, added[kept.columns]], ignore_index=True)
+
+
+# Function to fetch job locations (one row per company, with how many saved jobs it has)
+@traced("db.fetch_job_locations", size=len)
+def fetch_job_locations(client, hashed_id):
+    select = "job_id, COMPANY!inner(company_id, company_name, company_lat, company_long, company_address), USER_JOB!inner(user_id)"
+    records = [record for page in _paged(lambda: client.table("JOB").select(select).eq("USER_JOB.user_id", hashed_id)) for record in page]
+    if records:
+        return locations_from_records(records)
+    return pd.DataFrame(columns=LOCATION_COLUMNS)  # Empty Table
+
+
+def locations_from_records(records):
+    """Flattens JOB rows with a nested COMPANY dict into one row per company plus a job count."""
+    df = _flatten(records)
+
+    # Count jobs per company and keep each company_id only once
+    df["count"] = df.groupby("company_id")["company_id"].transform("size")
+    df = df.drop_duplicates(subset=["company_id"])
+    return df[LOCATION_COLUMNS].reset_index(drop=True)
+
+
+def compact_jobs(df):
+    """Stores the repeated listing columns as categoricals (applied again after every merge)."""
+    columns = [column for column in CATEGORY_COLUMNS if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype)]
+    if columns:
+        df = df.astype({column: "category" for column in columns})
+    return df
+
+
+def job_set_version(jobs):
+    """Hash of a user's saved job IDs; changes only when jobs are added or removed."""
+    job_ids = "\n".join(sorted(jobs["job_id"].astype(str)))
+    return hashlib.sha256(job_ids.encode()).hexdigest()
+
+
+# Function to delete a job by ID
+@traced("db.delete_job")
+def delete_job(client, hashed_id, job_id):
+    return client.table("USER_JOB").delete().eq("job_id", job_id).eq("user_id", hashed_id).execute()
+
+
+# Function to delete several jobs in one request
+@traced("db.delete_jobs")
+def delete_jobs(client, hashed_id, job_ids):
+    return client.table("USER_JOB").delete().eq("user_id", hashed_id).in_("job_id", list(job_ids)).execute()
+
+
+# Function to fetch a user's display name
+@traced("db.fetch_username")
+def fetch_username(client, hashed_id):
+    response = client.table("USER").select("user_name").eq("user_id", hashed_id).execute()
+    if response.data:
+        return response.data[0]["user_name"]
+    return None
+
+
+# Function to update a user's display name
+@traced("db.update_username")
+def update_username(client, hashed_id, new_username):
+    return client.table("USER").update({"user_name": new_username}).eq("user_id", hashed_id).execute()
+
+
+# Cache entries derived from a user's saved jobs
+DERIVED_KINDS = ("locations", "version")
+
+
+class JobStore:
+    """
+    Per-user read-through cache in front of the Supabase queries above.
+
+    Entries are keyed by (hashed_id, kind) and expire after `ttl` seconds. An expired listings
+    frame is not thrown away: the next read syncs it incrementally, fetching only the rows of
+    jobs added since and dropping removed ones. Writes go straight to Supabase and then update
+    or drop the affected user's entries, so the next read is fresh.
+
+    Listing frames are kept compact: categorical title/company/level columns and no skills text.
+    The text lives in a separate pool keyed by job_id, shared by every user who saved the job and
+    interned so identical requirements are stored once; `attach_skills` adds it back to just the
+    rows being shown, refetching any that were evicted.
+
+    Loads are coalesced per (hashed_id, kind): concurrent sessions of one user share one query.
+    """
+
+    def __init__(self, client, maxsize=256, ttl=300, skills_maxsize=200_000, skills_ttl=86400, dedup_window=DEDUP_WINDOW):
+        self.client = client
+        self.flights = SingleFlight("db", window=dedup_window)
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, sizeof=estimate_bytes)
+        self.skills = TTLCache(maxsize=skills_maxsize, ttl=skills_ttl, sizeof=sys.getsizeof)
+
+    @traced("store.jobs", size=len)
+    def jobs(self, hashed_id, skills=False):
+        # Callers mutate the frame (renames, etc.), so hand out copies
+        df = self._jobs(hashed_id).copy()
+        if skills:
+            df = self.attach_skills(hashed_id, df)
+        return df
+
+    def _jobs(self, hashed_id):
+        df = self.cache.get((hashed_id, "jobs"))
+        if df is None:
+            df = self.sync(hashed_id)
+        return df
+
+    @traced("store.attach_skills", size=len)
+    def attach_skills(self, hashed_id, df, id_column="job_id", column=SKILLS_COLUMN):
+        """Adds the skills text for the frame's rows as `column` (in its usual position) and returns the frame."""
+        job_ids = df[id_column].tolist()
+        texts = [self.skills.get(job_id) for job_id in job_ids]
+        missing = [job_id for job_id, text in zip(job_ids, texts) if text is None]
+        if missing:
+            fetched = self._remember_skills(fetch_jobs_by_id(self.client, hashed_id, missing, columns=["job_id", SKILLS_COLUMN]))
+            texts = [fetched.get(job_id, "") if text is None else text for job_id, text in zip(job_ids, texts)]
+        if column in df:
+            df[column] = texts
+        else:
+            df.insert(min(JOB_COLUMNS.index(SKILLS_COLUMN), len(df.columns)), column, pd.Series(texts, index=df.index, dtype=object))
+        return df
+
+    def _remember_skills(self, df):
+        """Moves a fetched frame's skills text into the pool; returns {job_id: text}."""
+        if SKILLS_COLUMN not in df:
+            return {}
+        texts = {job_id: sys.intern(text) if isinstance(text, str) else "" for job_id, text in zip(df["job_id"].tolist(), df.pop(SKILLS_COLUMN).tolist())}
+        self.skills.set_many(texts.items())
+        return texts
+
+    @traced("store.warm")
+    def warm(self, hashed_id):
+        """Loads a user's listings and their version into the cache (e.g. from a background prefetch)."""
+        return self.version(hashed_id)
+
+    def cached(self, hashed_id, kind):
+        return (hashed_id, kind) in self.cache
+
+    @traced("store.sync", size=len)
+    def sync(self, hashed_id):
+        """Brings a user's cached listings up to date and returns them."""
+        return self.flights.do((hashed_id, "sync"), lambda: self._sync(hashed_id))
+
+    def _sync(self, hashed_id):
+        key = (hashed_id, "jobs")
+        cached = self.cache.peek(key)
+        if cached is None:
+            df = fetch_jobs(self.client, hashed_id)
+            self._remember_skills(df)
+        else:
+            job_ids = fetch_job_ids(self.client, hashed_id)
+            cached_ids = set(cached["job_id"])
+            added = [job_id for job_id in job_ids if job_id not in cached_ids]
+            removed = cached_ids.difference(job_ids)
+            if not added and not removed:
+                self.cache.set(key, cached)
+                return cached
+            added = fetch_jobs_by_id(self.client, hashed_id, added)
+            self._remember_skills(added)
+            df = merge_jobs(cached, added, removed)
+        df = compact_jobs(df)
+        self.cache.set(key, df)
+        self.invalidate(hashed_id, *DERIVED_KINDS)
+        return df
+
+    @traced("store.job_locations", size=len)
+    def job_locations(self, hashed_id):
+        load = lambda: self.flights.do((hashed_id, "locations"), lambda: fetch_job_locations(self.client, hashed_id))
+        return self.cache.get_or_set((hashed_id, "locations"), load).copy()
+
+    def version(self, hashed_id):
+        return self.cache.get_or_set((hashed_id, "version"), lambda: job_set_version(self._jobs(hashed_id)))
+
+    def username(self, hashed_id):
+        return self.cache.get_or_set((hashed_id, "username"), lambda: self.flights.do((hashed_id, "username"), lambda: fetch_username(self.client, hashed_id)))
+
+    def delete_job(self, hashed_id, job_id):
+        response = delete_job(self.client, hashed_id, job_id)
+        self._forget_jobs(hashed_id, [job_id])
+        return response
+
+    def delete_jobs(self, hashed_id, job_ids):
+        response = delete_jobs(self.client, hashed_id, job_ids)
+        self._forget_jobs(hashed_id, job_ids)
+        return response
+
+    def _forget_jobs(self, hashed_id, job_ids):
+        key = (hashed_id, "jobs")
+        if key in self.cache:
+            jobs = self.cache.peek(key)
+            self.cache.set(key, jobs[~jobs["job_id"].isin(job_ids)].reset_index(drop=True))
+        self._written(hashed_id, "sync", *DERIVED_KINDS)
+
+    def update_username(self, hashed_id, new_username):
+        response = update_username(self.client, hashed_id, new_username)
+        self._written(hashed_id, "username")
+        return response
+
+    def _written(self, hashed_id, *kinds):
+        """After a write: drops the cached `kinds` and stops sharing reads of them from before the write."""
+        self.flights.forget(lambda key: key[0] == hashed_id and key[1] in kinds)
+        self.invalidate(hashed_id, *kinds)
+
+    def invalidate(self, hashed_id, *kinds):
+        """Drops the cached `kinds` for a user, or everything cached for them if none are given."""
+        if kinds:
+            for kind in kinds:
+                self.cache.invalidate((hashed_id, kind))
+        else:
+            self.cache.invalidate_where(lambda key: key[0] == hashed_id)
+
+    def nbytes(self):
+        return self.cache.nbytes + self.skills.nbytes
+
+    def evict(self, hashed_id):
+        """Drops everything cached for a user, including the pooled skills text of their jobs."""
+        jobs = self.cache.peek((hashed_id, "jobs"))
+        if jobs is not None:
+            for job_id in jobs["job_id"].tolist():
+                self.skills.invalidate(job_id)
+        self.invalidate(hashed_id)
+
+    def stats(self):
+        return {**self.cache.stats(), "skills": self.skills.stats()}
@@ -0,0 +1,278 @@
+"""
+Near-duplicate listing detection.
+
+The scraper often saves the same role more than once (reposts, one listing per location, agencies
+posting for the same client). Each job gets a MinHash signature over its title, company and
+requirement features, and LSH banding puts jobs whose signatures agree on a whole band into the
+same bucket. Only jobs sharing a bucket are compared, so clustering stays roughly linear in the
+number of jobs. Candidates whose estimated Jaccard similarity reaches `DEDUP_THRESHOLD` are
+merged, and each cluster is shown (and scored) once.
+"""
+import os
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+from ranking import SyncedIndex, parse_skills, tokenize
+
+# Estimated Jaccard similarity at which two listings count as the same role
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", 0.8))
+# 16 bands of 8 rows: pairs at 0.8 similarity share a bucket with probability 0.95, pairs at 0.5
+# only 6% of the time, which keeps buckets (and comparisons) small
+BANDS = 16
+ROWS = 8
+NUM_PERM = BANDS * ROWS
+# Features hashed at once, bounding the (NUM_PERM x features) temporary
+CHUNK_FEATURES = 32_768
+# Earlier rows of a bucket each new row is compared with. Rows of a bucket are usually all alike,
+# so comparing with the most recent ones still links a large cluster while keeping the work linear
+BUCKET_PEERS = 32
+# Signature values compared at once when checking candidate pairs
+COMPARE_CELLS = 4_000_000
+
+_EMPTY = np.iinfo(np.uint32).max
+_rng = np.random.default_rng(0x5EED)
+# Multiply-shift hashing: the high 32 bits of (a * x + b) mod 2**64, with odd a
+_A = _rng.integers(0, 1 << 63, size=(NUM_PERM, 1), dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+_B = _rng.integers(0, 1 << 63, size=(NUM_PERM, 1), dtype=np.uint64)
+# Mixes each band's rows into one bucket key
+_BAND_MIX = _rng.integers(1, 1 << 31, size=ROWS, dtype=np.uint64)
+
+
+def title_features(title):
+    return {f"t:{token}" for token in tokenize(title or "")}
+
+
+def company_features(company):
+    return {f"c:{token}" for token in tokenize(company or "")}
+
+
+def skills_features(skills_text):
+    """Skill names plus adjacent word pairs of the requirement text."""
+    skills_text = skills_text if isinstance(skills_text, str) else ""
+    result = {f"s:{' '.join(tokenize(name))}" for name in parse_skills(skills_text)}
+    words = tokenize(skills_text)
+    result.update(f"d:{first} {second}" for first, second in zip(words, words[1:]))
+    return result
+
+
+# Indexed column -> feature extractor; a job's features are the union over its columns
+FEATURES = {
+    "job_title": title_features,
+    "company_name": company_features,
+    "job_skills_required": skills_features,
+}
+
+
+def features(title, company, skills_text):
+    """Feature set compared between listings (the exact Jaccard similarity the signatures estimate)."""
+    return title_features(title) | company_features(company) | skills_features(skills_text)
+
+
+def signatures(feature_sets):
+    """MinHash signatures (uint32, one row of NUM_PERM per set); empty sets get all-max rows."""
+    out = np.full((len(feature_sets), NUM_PERM), _EMPTY, dtype=np.uint32)
+    start = 0
+    while start < len(feature_sets):
+        # Take sets until the chunk is full (always at least one)
+        end, size = start, 0
+        while end < len(feature_sets) and (end == start or size + len(feature_sets[end]) <= CHUNK_FEATURES):
+            size += len(feature_sets[end])
+            end += 1
+        lengths = np.fromiter((len(s) for s in feature_sets[start:end]), dtype=np.int64, count=end - start)
+        if size:
+            hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for s in feature_sets[start:end] for f in s), dtype=np.uint64, count=size)
+            permuted = ((_A * hashes + _B) >> np.uint64(32)).astype(np.uint32)
+            nonempty = lengths > 0
+            offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])[nonempty]
+            out[start:end][nonempty] = np.minimum.reduceat(permuted, offsets, axis=1).T
+        start = end
+    return out
+
+
+def column_signatures(values, featurize):
+    """Signatures of each value's features, computing each distinct value once."""
+    positions = {}
+    codes = np.fromiter((positions.setdefault(value, len(positions)) for value in values), dtype=np.int64, count=len(values))
+    return signatures([featurize(value) for value in positions])[codes]
+
+
+def band_keys(signature_rows):
+    """One bucket key per (row, band), as an (n, BANDS) uint64 array."""
+    bands = signature_rows.reshape(len(signature_rows), BANDS, ROWS).astype(np.uint64)
+    return (bands * _BAND_MIX).sum(axis=2) + np.arange(BANDS, dtype=np.uint64)
+
+
+class DuplicateIndex(SyncedIndex):
+    """
+    Append-only MinHash signatures and LSH buckets over a user's jobs, with tombstones for deleted jobs.
+
+    Band keys are kept in a sorted array with the first row that had each key; only keys shared
+    by several jobs get a row list. Signatures are computed once per job as jobs are added, and
+    only the new rows of each shared bucket are compared when clusters are next read. Removing
+    jobs relinks every shared bucket.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD):
+        self.lock = threading.RLock()
+        self.version = None  # Job-set version the signatures were last synced to
+        self.threshold = threshold
+        self.job_ids = []
+        self.row_of = {}  # job_id -> row
+        self.signatures = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self.alive = np.empty(0, dtype=bool)
+        self.keys = np.empty(0, dtype=np.uint64)  # Sorted distinct band keys
+        self.key_rows = np.empty(0, dtype=np.int64)  # First row with each key
+        self.shared = {}  # band key held by several rows -> rows, in order
+        self.parent = {}  # Union-find over rows with a near-duplicate; roots are the earliest rows
+        self._pending = {}  # Shared band key -> bucket position from which rows haven't been compared yet
+        self._relink = False  # Set when jobs are removed
+        self._clusters = None
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def nbytes(self):
+        """Approximate memory held by the signatures, bucket keys and per-job tables."""
+        arrays = (self.signatures, self.alive, self.keys, self.key_rows)
+        shared = sys.getsizeof(self.shared) + sum(sys.getsizeof(rows) for rows in self.shared.values())
+        tables = sum(sys.getsizeof(table) for table in (self.job_ids, self.row_of, self.parent))
+        return sum(array.nbytes for array in arrays) + shared + tables
+
+    def add(self, jobs):
+        """Adds signatures for a frame with job_id and the FEATURES columns."""
+        new = [position for position, job_id in enumerate(jobs["job_id"].tolist()) if job_id not in self.row_of]
+        if not new:
+            return
+        jobs = jobs.iloc[new]
+        first = len(self.job_ids)
+        for job_id in jobs["job_id"].tolist():
+            self.row_of[job_id] = len(self.job_ids)
+            self.job_ids.append(job_id)
+        # MinHash of a union is the elementwise min of the parts' MinHashes, and titles, companies
+        # and requirement texts repeat across jobs, so each distinct value is hashed once
+        added = None
+        for column, featurize in FEATURES.items():
+            part = column_signatures(jobs[column].tolist(), featurize)
+            added = part if added is None else np.minimum(added, part)
+        self.signatures = np.concatenate([self.signatures, added])
+        self.alive = np.concatenate([self.alive, np.ones(len(added), dtype=bool)])
+
+        rows = np.arange(first, first + len(added))
+        compared = ~(added == _EMPTY).all(axis=1)  # Jobs with no features can't be compared
+        self._bucket(band_keys(added[compared]).ravel(), np.repeat(rows[compared], BANDS))
+        self._clusters = None
+
+    def _bucket(self, keys, rows):
+        """Merges new (key, row) entries into the sorted keys, recording keys several rows share."""
+        all_keys = np.concatenate([self.keys, keys])
+        all_rows = np.concatenate([self.key_rows, rows])
+        order = np.argsort(all_keys, kind="stable")  # Existing entries, then new rows in row order
+        all_keys, all_rows = all_keys[order], all_rows[order]
+        starts = np.flatnonzero(np.concatenate([[True], all_keys[1:] != all_keys[:-1]]))
+        run_lengths = np.diff(np.append(starts, len(all_keys)))
+        for start, length in zip(starts[run_lengths > 1].tolist(), run_lengths[run_lengths > 1].tolist()):
+            key = int(all_keys[start])
+            run = all_rows[start:start + length].tolist()
+            bucket = self.shared.get(key)
+            if bucket is None:
+                bucket = self.shared[key] = run[:1]
+            self._pending.setdefault(key, len(bucket))
+            bucket.extend(run[1:])
+        self.keys, self.key_rows = all_keys[starts], all_rows[starts]
+
+    def indexed(self):
+        return self.row_of
+
+    def remove(self, job_ids):
+        for job_id in job_ids:
+            row = self.row_of.pop(job_id, None)
+            if row is not None:
+                self.alive[row] = False
+                self._relink = True
+                self._clusters = None
+
+    def similarity(self, first, second):
+        """Estimated Jaccard similarity of two indexed jobs."""
+        with self.lock:
+            a, b = self.signatures[self.row_of[first]], self.signatures[self.row_of[second]]
+            return float(np.count_nonzero(a == b)) / NUM_PERM
+
+    def clusters(self):
+        """
+        {job_id: cluster representative} for every job with a near-duplicate.
+
+        The representative is the earliest-indexed job. Jobs are indexed in job_id order (the order
+        the store loads them in), then newly saved jobs as they sync, so it is the cluster's lowest
+        job ID unless a later sync added a lower one. The store has no save time to go by.
+        """
+        with self.lock:
+            if self._clusters is None:
+                if self._relink:
+                    # A deleted job may have been the only link between two others, so start over
+                    self.parent, self._relink = {}, False
+                    self._pending = dict.fromkeys(self.shared, 1)
+                self._link(*self._candidates())
+                self._pending = {}
+                rows = [row for row in self.parent if self.alive[row]]
+                self._clusters = {self.job_ids[row]: self.job_ids[self._find(row)] for row in rows}
+            return self._clusters
+
+    def _candidates(self):
+        """(new row, earlier row) pairs sharing a bucket whose new rows haven't been compared yet, each pair once."""
+        new, old = [], []
+        for key, start in self._pending.items():
+            bucket = self.shared[key]
+            for position in range(start, len(bucket)):
+                peers = bucket[max(0, position - BUCKET_PEERS):position]
+                new.extend([bucket[position]] * len(peers))
+                old.extend(peers)
+        new, old = np.asarray(new, dtype=np.int64), np.asarray(old, dtype=np.int64)
+        live = self.alive[new] & self.alive[old]
+        # Pairs sharing several bands are checked once
+        pairs = np.sort((new[live] << 32) | old[live])
+        pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])] if len(pairs) else pairs
+        return pairs >> 32, pairs & 0xFFFFFFFF
+
+    def _find(self, row):
+        root = row
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while row != root:  # Path compression
+            self.parent[row], row = root, self.parent.get(row, row)
+        return root
+
+    def _link(self, new, old):
+        """Joins the clusters of candidate pairs whose signatures agree on at least `threshold` of their values."""
+        block = max(1, COMPARE_CELLS // NUM_PERM)
+        for offset in range(0, len(new), block):
+            first, second = new[offset:offset + block], old[offset:offset + block]
+            similar = (self.signatures[first] == self.signatures[second]).sum(axis=1) >= self.threshold * NUM_PERM
+            for row, match in zip(first[similar].tolist(), second[similar].tolist()):
+                root, other = sorted((self._find(row), self._find(match)))
+                self.parent.setdefault(root, root)
+                self.parent[other] = root  # The earlier row stays the root
+
+    def collapse(self, job_ids):
+        """
+        Keeps the first of each cluster's jobs among `job_ids` (in order); returns (kept job IDs,
+        {kept job_id: number of near-duplicates hidden behind it}).
+        """
+        clusters = self.clusters()
+        kept, hidden, shown = [], {}, {}
+        for job_id in job_ids:
+            cluster = clusters.get(job_id)
+            if cluster is None:
+                kept.append(job_id)
+            elif cluster in shown:
+                hidden[shown[cluster]] = hidden.get(shown[cluster], 0) + 1
+            else:
+                shown[cluster] = job_id
+                kept.append(job_id)
+        return kept, hidden
+
+    def duplicates(self):
+        """Job IDs that are near-duplicates of an earlier-added job."""
+        return {job_id for job_id, representative in self.clusters().items() if job_id != representative}
@@ -0,0 +1,44 @@
+import io
+
+from cache import TTLCache
+from memory import estimate_bytes
+
+CSV_MIME = "text/csv"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def to_csv_bytes(df):
+    # st.download_button takes the whole file as bytes and can't stream it, so the CSV is built in
+    # one piece; peak memory is about twice the file size (the text and its UTF-8 encoding)
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def to_xlsx_bytes(df):
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+EXPORTERS = {
+    "csv": to_csv_bytes,
+    "xlsx": to_xlsx_bytes,
+}
+
+
+class ExportCache:
+    """
+    In-memory export files, built on first download and reused per (user, data version, format).
+
+    Nothing is written to disk, so concurrent sessions can't clobber each other's files.
+    """
+
+    def __init__(self, maxsize=64, ttl=3600):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, sizeof=estimate_bytes)
+
+    def get(self, hashed_id, version, fmt, df):
+        """`df` is the frame to export, or a zero-argument callable returning it."""
+        return self.cache.get_or_set((hashed_id, version, fmt), lambda: EXPORTERS[fmt](df() if callable(df) else df))
+
+    def loader(self, hashed_id, version, fmt, df):
+        """Zero-argument callable for st.download_button, so the file (and `df`, if callable) is only built when clicked."""
+        return lambda: self.get(hashed_id, version, fmt, df)
@@ -0,0 +1,191 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Above this many companies, nearby points are merged server-side before reaching the browser
+CLUSTER_THRESHOLD = int(os.environ.get("GEO_CLUSTER_THRESHOLD", 500))
+# Starting grid cell size for aggregation, in degrees (~1 km at the equator)
+MIN_CELL_DEG = 0.01
+
+
+def aggregate_points(df, max_points=CLUSTER_THRESHOLD, cell_deg=MIN_CELL_DEG):
+    """
+    Merges companies into lat/long grid cells, doubling the cell size until at most
+    `max_points` remain. Each cell is placed at its companies' mean position and carries
+    their summed job count.
+    """
+    if len(df) <= max_points:
+        return df
+    coords = df[["company_lat", "company_long"]].to_numpy()
+    while True:
+        cells = np.floor(coords / cell_deg).astype(np.int64)
+        cell_ids = pd.MultiIndex.from_arrays([cells[:, 0], cells[:, 1]])
+        if cell_ids.nunique() <= max_points:
+            break
+        cell_deg *= 2
+
+    grouped = df.groupby([cells[:, 0], cells[:, 1]], sort=False)
+    out = grouped.agg(
+        company_lat=("company_lat", "mean"),
+        company_long=("company_long", "mean"),
+        count=("count", "sum"),
+        companies=("company_name", "size"),
+        company_name=("company_name", "first"),
+    ).reset_index(drop=True)
+    others = out["companies"] - 1
+    out["company_name"] = out["company_name"].where(others == 0, out["company_name"] + " and " + others.astype(str) + " others")
+    return out
+
+
+def build_map_html(df, visualization):
+    """Builds the leafmap HTML for a points or heatmap view of company locations."""
+    # The mapping stack takes seconds to import, so only load it once a map is actually built
+    import leafmap.foliumap as leafmap
+
+    center = [df["company_lat"].mean(), df["company_long"].mean()]
+    points = aggregate_points(df)
+    m = leafmap.Map(center=center, zoom=4)
+    if visualization == "Points":
+        m.add_points_from_xy(
+            points,
+            y="company_lat",
+            x="company_long",
+            layer_name="Job Locations",
+        )
+    elif visualization == "Heatmap":
+        m.add_heatmap(
+            points,
+            latitude="company_lat",
+            longitude="company_long",
+            value="count",
+            name="Job Locations Heatmap",
+        )
+    m.add_layer_control()
+    return m.to_html()
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.195
+# Target number of companies per grid cell of a LocationIndex
+CELL_OCCUPANCY = 32
+
+
+def haversine_km(lat, long, lats, longs):
+    """Great-circle distance in km from one point to arrays of points (all in degrees)."""
+    lat, long = np.radians(lat), np.radians(long)
+    lats, longs = np.radians(lats), np.radians(longs)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((longs - long) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class LocationIndex:
+    """
+    Grid index over company coordinates for radius and nearest-k queries.
+
+    Companies are bucketed into square lat/long cells sized for ~CELL_OCCUPANCY companies each and
+    sorted by cell, so the companies of one row of cells form a contiguous slice. A query only
+    computes exact haversine distances for the cells overlapping its bounding box.
+    """
+
+    def __init__(self, df):
+        df = df.dropna(subset=["company_lat", "company_long"])
+        lats = df["company_lat"].to_numpy(dtype=float)
+        longs = df["company_long"].to_numpy(dtype=float)
+
+        area = max(np.ptp(lats) * np.ptp(longs), 1e-6) if len(df) else 1.0
+        self.cell_deg = float(np.clip(np.sqrt(area * CELL_OCCUPANCY / max(len(df), 1)), 0.001, 10.0))
+        self.row_width = int(np.ceil(360 / self.cell_deg)) + 1
+
+        keys = self._cell_keys(lats, longs)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.lats = np.radians(lats[order])
+        self.longs = np.radians(longs[order])
+        self.cos_lats = np.cos(self.lats)
+        # Plain arrays: building a small frame from them is much cheaper than slicing a DataFrame
+        self.columns = {column: df[column].to_numpy()[order] for column in df.columns}
+
+    def nbytes(self):
+        """Approximate memory held by the index's arrays."""
+        return sum(array.nbytes for array in (self.keys, self.lats, self.longs, self.cos_lats, *self.columns.values()))
+
+    def _cell_keys(self, lats, longs):
+        rows = np.floor((lats + 90) / self.cell_deg).astype(np.int64)
+        cols = np.floor((longs + 180) / self.cell_deg).astype(np.int64)
+        return rows * self.row_width + cols
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _candidates(self, lat, long, radius_km):
+        """Positions of companies in the cells overlapping the query's bounding box."""
+        dlat = radius_km / KM_PER_DEG_LAT
+        lat_lo, lat_hi = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+        max_cos = np.cos(np.radians(max(abs(lat_lo), abs(lat_hi))))
+        dlong = 180.0 if max_cos < 1e-6 else min(dlat / max_cos, 180.0)
+
+        row_lo = int(np.floor((lat_lo + 90) / self.cell_deg))
+        row_hi = int(np.floor((lat_hi + 90) / self.cell_deg))
+        rows = np.arange(row_lo, row_hi + 1, dtype=np.int64) * self.row_width
+
+        # Longitude ranges, split in two when the box crosses the antimeridian
+        if dlong >= 180.0:
+            ranges = [(-180.0, 180.0)]
+        else:
+            long_lo, long_hi = long - dlong, long + dlong
+            ranges = [(max(long_lo, -180.0), min(long_hi, 180.0))]
+            if long_lo < -180.0:
+                ranges.append((long_lo + 360.0, 180.0))
+            if long_hi > 180.0:
+                ranges.append((-180.0, long_hi - 360.0))
+
+        starts, ends = [], []
+        for lo, hi in ranges:
+            col_lo = int(np.floor((lo + 180) / self.cell_deg))
+            col_hi = int(np.floor((hi + 180) / self.cell_deg))
+            starts.append(np.searchsorted(self.keys, rows + col_lo, side="left"))
+            ends.append(np.searchsorted(self.keys, rows + col_hi, side="right"))
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        keep = ends > starts
+        if not keep.any():
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(s, e) for s, e in zip(starts[keep], ends[keep])])
+
+    def _distances(self, lat, long, positions):
+        # Haversine against the precomputed radians/cosines of the candidates
+        lat, long = np.radians(lat), np.radians(long)
+        a = np.sin((self.lats[positions] - lat) / 2) ** 2 + np.cos(lat) * self.cos_lats[positions] * np.sin((self.longs[positions] - long) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def within(self, lat, long, radius_km):
+        """Companies within `radius_km` of (lat, long), nearest first, with a distance_km column."""
+        positions = self._candidates(lat, long, radius_km)
+        distances = self._distances(lat, long, positions)
+        hit = distances <= radius_km
+        return self._result(positions[hit], distances[hit])
+
+    def nearest(self, lat, long, k):
+        """The `k` companies nearest to (lat, long), nearest first, with a distance_km column."""
+        k = min(k, len(self))
+        if k == 0:
+            return self._result(np.empty(0, dtype=np.int64), np.empty(0))
+        # Grow the search radius until it holds k companies; those are then the k nearest overall
+        radius_km = self.cell_deg * KM_PER_DEG_LAT
+        while True:
+            positions = self._candidates(lat, long, radius_km)
+            distances = self._distances(lat, long, positions)
+            hit = distances <= radius_km
+            if hit.sum() >= k or radius_km >= np.pi * EARTH_RADIUS_KM:
+                break
+            radius_km *= 2
+        positions, distances = positions[hit], distances[hit]
+        top = np.argpartition(distances, k - 1)[:k] if len(distances) > k else np.arange(len(distances))
+        return self._result(positions[top], distances[top])
+
+    def _result(self, positions, distances):
+        order = np.argsort(distances, kind="stable")
+        positions = positions[order]
+        result = {column: values[positions] for column, values in self.columns.items()}
+        result["distance_km"] = distances[order]
+        return pd.DataFrame(result)
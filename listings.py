@@ -0,0 +1,90 @@
+import math
+
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+# Column widths shared by the header and each card row
+CARD_WIDTHS = [2, 1, 5, 4, 1, 1.5]
+
+
+def page_slice(df, page, page_size):
+    """Returns the rows shown on `page` (1-based)."""
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
+
+
+def pagination_controls(total, key):
+    """Renders page size / page number inputs and returns (page, page_size)."""
+    col1, col2, col3 = st.columns([1, 1, 6])
+    with col1:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    pages = max(1, math.ceil(total / page_size))
+    with col2:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    with col3:
+        st.caption(f"{total} listings · page {page} of {pages}")
+    return int(page), page_size
+
+
+def render_listings_grid(page_data, key="listings"):
+    """Renders one page of listings as a single selectable dataframe and returns the selected Job IDs."""
+    event = st.dataframe(
+        page_data,
+        hide_index=True,
+        width="stretch",
+        on_select="rerun",
+        selection_mode="multi-row",
+        column_order=["Position", "Company", "Technical Requirements", "Experience", "URL"] + (["Similar"] if "Similar" in page_data else []),
+        column_config={
+            "Technical Requirements": st.column_config.TextColumn(width="large"),
+            "URL": st.column_config.LinkColumn("Job URL", display_text="🔗 View Job"),
+            "Similar": st.column_config.NumberColumn(help="Near-duplicate listings hidden behind this one"),
+        },
+        key=key,
+    )
+    return page_data.iloc[event.selection.rows]["Job ID"].tolist()
+
+
+def render_listings_cards(page_data):
+    """Renders one page of listings as card rows (the original layout) and returns the Job ID whose ❌ was clicked."""
+    header_col1, header_col2, header_col3, header_col4, header_col5, header_col6 = st.columns(CARD_WIDTHS)
+    with header_col1:
+        st.subheader("Position")
+    with header_col2:
+        st.subheader("Company")
+    with header_col3:
+        st.subheader("Technical Requirements")
+    with header_col4:
+        st.subheader("Experience")
+    with header_col5:
+        st.subheader("Job URL")
+    with header_col6:
+        st.subheader("Actions")
+
+    st.markdown("---")
+    deleted = None
+    for index, row in page_data.iterrows():
+        col1, col2, col3, col4, col5, col6 = st.columns(CARD_WIDTHS)
+
+        with col1:
+            st.write(f"**{row['Position']}**")
+
+        with col2:
+            st.write(row['Company'])
+
+        with col3:
+            st.write(row['Technical Requirements'])
+
+        with col4:
+            st.write(row['Experience'])
+
+        with col5:
+            job_url = row["URL"]
+            st.markdown(f"[🔗 View Job]({job_url})", unsafe_allow_html=True)
+
+        with col6:
+            if st.button("❌", key=row["Job ID"]):
+                deleted = row["Job ID"]
+        st.markdown("---")
+    return deleted
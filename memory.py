@@ -0,0 +1,92 @@
+"""
+Process-wide memory budget for per-user cached data.
+
+Caches built with `sizeof=estimate_bytes` keep a running size estimate. `MemoryBudget` adds those
+estimates up and, once the total is over the limit, evicts the data of the users whose sessions
+were least recently active, so a burst of concurrent users can't grow the dyno without bound.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Budget for cached per-user data in MiB (0 disables eviction)
+MEMORY_BUDGET_MB = float(os.environ.get("MEMORY_BUDGET_MB", 512))
+
+
+def estimate_bytes(value):
+    """Rough in-memory size of a cached value."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_bytes(item) for item in value)
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes() if callable(nbytes) else nbytes)
+    return sys.getsizeof(value)
+
+
+class MemoryBudget:
+    """
+    Evicts least-recently-active users' cached data while the registered caches exceed `limit` bytes.
+
+    Sessions `touch()` their user on every rerun. Sources report bytes in use and evictors drop
+    everything cached for one user.
+    """
+
+    def __init__(self, limit, timer=time.monotonic):
+        self.limit = limit
+        self.timer = timer
+        self.sources = []  # callables returning bytes in use
+        self.evictors = []  # callables dropping one user's data
+        self.activity = OrderedDict()  # user -> last active time, least recent first
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def register(self, usage, evict):
+        self.sources.append(usage)
+        self.evictors.append(evict)
+
+    def register_cache(self, cache, owner):
+        """Registers a TTLCache built with a `sizeof`, whose keys belong to `owner(key)`."""
+        self.register(lambda: cache.nbytes, lambda user: cache.invalidate_where(lambda key: owner(key) == user))
+
+    def touch(self, user):
+        with self._lock:
+            self.activity[user] = self.timer()
+            self.activity.move_to_end(user)
+
+    def usage(self):
+        return sum(source() for source in self.sources)
+
+    def enforce(self, keep=()):
+        """Evicts inactive users until usage is within the limit; returns the evicted users."""
+        evicted = []
+        if not self.limit:
+            return evicted
+        with self._lock:
+            candidates = [user for user in self.activity if user not in keep]
+        for user in candidates:
+            if self.usage() <= self.limit:
+                break
+            for evict in self.evictors:
+                evict(user)
+            with self._lock:
+                self.activity.pop(user, None)
+                self.evictions += 1
+            evicted.append(user)
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            users = len(self.activity)
+        return {"limit": self.limit, "usage": self.usage(), "users": users, "evictions": self.evictions}
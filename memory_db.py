@@ -0,0 +1,271 @@
+"""
+In-memory stand-in for the Supabase client.
+
+Implements the slice of the PostgREST query builder the app uses (select with one level of
+`!inner` embedding, eq/gt/in_ filters, order, limit, update, delete) over the JOB, COMPANY,
+USER_JOB and USER tables. Select it with DATA_BACKEND=memory.
+"""
+import bisect
+import random
+import re
+import threading
+from types import SimpleNamespace
+
+# Foreign keys used to resolve embedded selects: (table, embedded table) -> (local column, remote column)
+RELATIONS = {
+    ("JOB", "COMPANY"): ("company_id", "company_id"),
+    ("JOB", "USER_JOB"): ("job_id", "job_id"),
+    ("USER_JOB", "JOB"): ("job_id", "job_id"),
+    ("USER_JOB", "USER"): ("user_id", "user_id"),
+}
+# Embeds that are one-to-many (returned as lists); the rest are many-to-one (returned as dicts)
+TO_MANY = {("JOB", "USER_JOB")}
+PRIMARY_KEYS = {"JOB": "job_id", "COMPANY": "company_id", "USER": "user_id"}
+
+_EMBED = re.compile(r"^(\w+)(!inner)?\((.*)\)$")
+
+
+def _split_fields(select):
+    """Splits a select string on top-level commas."""
+    fields, depth, current = [], 0, ""
+    for char in select:
+        if char == "," and depth == 0:
+            fields.append(current.strip())
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    if current.strip():
+        fields.append(current.strip())
+    return fields
+
+
+class MemoryClient:
+    def __init__(self):
+        self.tables = {"JOB": {}, "COMPANY": {}, "USER": {}, "USER_JOB": []}
+        # user_id -> set of job_ids, the index the dashboard's queries lean on
+        self.user_jobs = {}
+        self._sorted_user_jobs = {}
+        self.lock = threading.RLock()
+        self.requests = 0
+
+    def sorted_user_jobs(self, user_id):
+        job_ids = self._sorted_user_jobs.get(user_id)
+        if job_ids is None:
+            job_ids = self._sorted_user_jobs[user_id] = sorted(self.user_jobs.get(user_id, ()))
+        return job_ids
+
+    def table(self, name):
+        return MemoryQuery(self, name)
+
+    def insert_rows(self, name, rows):
+        with self.lock:
+            for row in rows:
+                if name == "USER_JOB":
+                    self.tables[name].append(dict(row))
+                    self.user_jobs.setdefault(row["user_id"], set()).add(row["job_id"])
+                    self._sorted_user_jobs.pop(row["user_id"], None)
+                else:
+                    self.tables[name][row[PRIMARY_KEYS[name]]] = dict(row)
+
+    def rows(self, name):
+        table = self.tables[name]
+        return table if isinstance(table, list) else list(table.values())
+
+
+class MemoryQuery:
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+        self.action = "select"
+        self.fields = ["*"]
+        self.filters = []
+        self.order_by = None
+        self.row_limit = None
+        self.values = None
+
+    def select(self, columns="*"):
+        self.fields = _split_fields(columns)
+        return self
+
+    def update(self, values):
+        self.action, self.values = "update", values
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append((column, lambda v, value=value: v == value, ("eq", value)))
+        return self
+
+    def gt(self, column, value):
+        self.filters.append((column, lambda v, value=value: v is not None and v > value, ("gt", value)))
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append((column, lambda v, values=values: v in values, ("in", values)))
+        return self
+
+    def order(self, column, desc=False):
+        self.order_by = (column, desc)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        with self.client.lock:
+            self.client.requests += 1
+            if self.action == "select":
+                return SimpleNamespace(data=self._select())
+            return SimpleNamespace(data=self._write())
+
+    def _candidates(self):
+        """Rows that may match, and whether they are already ordered by job_id."""
+        # Use the sorted user -> jobs index when the query is scoped to one user's jobs
+        for column, _, (op, value) in self.filters:
+            if self.name == "JOB" and column == "USER_JOB.user_id" and op == "eq":
+                job_ids = self.client.sorted_user_jobs(value)
+                for column, _, (op, after) in self.filters:
+                    if column == "job_id" and op == "gt":
+                        job_ids = job_ids[bisect.bisect_right(job_ids, after):]
+                jobs = self.client.tables["JOB"]
+                return (jobs[job_id] for job_id in job_ids if job_id in jobs), True
+        return self.client.rows(self.name), False
+
+    def _matches(self, row, embedded):
+        for column, test, _ in self.filters:
+            if "." in column:
+                embed, field = column.split(".", 1)
+                related = embedded.get(embed)
+                related = related if isinstance(related, list) else [related] if related else []
+                if not any(test(r.get(field)) for r in related):
+                    return False
+            elif not test(row.get(column)):
+                return False
+        return True
+
+    def _embed(self, row, other, columns):
+        local, remote = RELATIONS[(self.name, other)]
+        if (self.name, other) in TO_MANY:
+            related = [r for r in self.client.rows(other) if r.get(remote) == row.get(local)] if other != "USER_JOB" \
+                else [{"user_id": user_id, "job_id": row["job_id"]} for user_id, job_ids in self.client.user_jobs.items() if row["job_id"] in job_ids]
+            return [self._project(r, columns) for r in related]
+        target = self.client.tables[other].get(row.get(local)) if other in PRIMARY_KEYS else None
+        return self._project(target, columns) if target else None
+
+    @staticmethod
+    def _project(row, columns):
+        if columns == ["*"]:
+            return dict(row)
+        return {column: row.get(column) for column in columns}
+
+    def _select(self):
+        plain, embeds = [], []
+        for field in self.fields:
+            match = _EMBED.match(field)
+            if match:
+                embeds.append((match.group(1), bool(match.group(2)), _split_fields(match.group(3))))
+            else:
+                plain.append(field)
+
+        candidates, by_job_id = self._candidates()
+        plain_filters = [f for f in self.filters if "." not in f[0]]
+        # Lazily filtered, so a limited page over the sorted index stops early
+        candidates = (row for row in candidates if all(test(row.get(column)) for column, test, _ in plain_filters))
+        if self.order_by and not (by_job_id and self.order_by == ("job_id", False)):
+            column, desc = self.order_by
+            candidates = sorted(candidates, key=lambda row: row.get(column), reverse=desc)
+
+        records = []
+        for row in candidates:
+            if self.row_limit is not None and len(records) >= self.row_limit:
+                break
+            embedded = {other: self._embed(row, other, columns) for other, _, columns in embeds}
+            # Filters on embedded tables narrow the embedded rows too, like PostgREST does
+            for column, test, _ in self.filters:
+                if "." in column:
+                    embed, field = column.split(".", 1)
+                    if isinstance(embedded.get(embed), list):
+                        embedded[embed] = [r for r in embedded[embed] if test(r.get(field))]
+            if any(inner and not embedded[other] for other, inner, _ in embeds):
+                continue
+            if not self._matches(row, embedded):
+                continue
+            record = self._project(row, plain) if plain else {}
+            record.update(embedded)
+            records.append(record)
+        return records
+
+    def _write(self):
+        table = self.client.tables[self.name]
+        if self.name == "USER_JOB":
+            kept, changed = [], []
+            for row in table:
+                (changed if self._matches(row, {}) else kept).append(row)
+            if self.action == "delete":
+                self.client.tables[self.name] = kept
+                for row in changed:
+                    self.client.user_jobs.get(row["user_id"], set()).discard(row["job_id"])
+                    self.client._sorted_user_jobs.pop(row["user_id"], None)
+            else:
+                for row in changed:
+                    row.update(self.values)
+            return [dict(row) for row in changed]
+
+        changed = [key for key, row in table.items() if self._matches(row, {})]
+        if self.action == "delete":
+            return [table.pop(key) for key in changed]
+        for key in changed:
+            table[key].update(self.values)
+        return [dict(table[key]) for key in changed]
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    """The process-wide MemoryClient used when DATA_BACKEND=memory."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MemoryClient()
+        return _shared
+
+
+SKILLS = ["Java", "Python", "SQL", "Git", "Docker", "Kubernetes", "React", "Spring Boot", "AWS", "Go",
+          "TypeScript", "Kafka", "PostgreSQL", "Linux", "Terraform", "C++", "Pandas", "Spark", "REST APIs", "CI/CD"]
+TITLES = ["Software Engineer", "Backend Developer", "Data Engineer", "Java Developer", "DevOps Engineer",
+          "Frontend Developer", "Machine Learning Engineer", "QA Engineer", "Site Reliability Engineer"]
+LEVELS = ["Internship", "Entry level", "Associate", "Mid-Senior level", "Director"]
+
+
+def seed_synthetic(client, hashed_id, n_jobs, n_companies=None, user_name=None, seed=0):
+    """Adds a synthetic user holding `n_jobs` saved jobs spread over `n_companies` companies around Kuala Lumpur."""
+    rng = random.Random(seed)
+    n_companies = n_companies or max(1, n_jobs // 5)
+    companies = [{
+        "company_id": f"{hashed_id[:8]}-c{i}",
+        "company_name": f"Company {i}",
+        "company_lat": 3.14 + rng.gauss(0, 0.15),
+        "company_long": 101.69 + rng.gauss(0, 0.15),
+        "company_address": f"{i} Jalan Synthetic, Kuala Lumpur",
+    } for i in range(n_companies)]
+    jobs = [{
+        "job_id": f"{hashed_id[:8]}-{i:07d}",
+        "job_title": rng.choice(TITLES),
+        "company_id": companies[rng.randrange(n_companies)]["company_id"],
+        "job_skills_required": "\n".join(f"- {skill}: required for this role" for skill in rng.sample(SKILLS, 5)),
+        "job_experience_level": rng.choice(LEVELS),
+        "job_url": f"https://www.linkedin.com/jobs/view/{i}",
+    } for i in range(n_jobs)]
+    client.insert_rows("COMPANY", companies)
+    client.insert_rows("JOB", jobs)
+    client.insert_rows("USER_JOB", [{"user_id": hashed_id, "job_id": job["job_id"]} for job in jobs])
+    client.insert_rows("USER", [{"user_id": hashed_id, "user_name": user_name or f"Synthetic {n_jobs}"}])
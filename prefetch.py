@@ -0,0 +1,78 @@
+"""
+Background prefetching of a user's data.
+
+A `Prefetcher` runs loads on a small shared thread pool and keeps at most one in-flight load per
+key, so sessions (and pages waiting on a load) share the request instead of repeating it. Loads
+are expected to warm a shared cache such as `JobStore`; readers call `wait()` and then read the
+cache as usual, which falls back to a synchronous fetch if the prefetch was cancelled, failed or
+is too slow.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+PREFETCH = os.environ.get("PREFETCH", "1") == "1"
+WORKERS = int(os.environ.get("PREFETCH_WORKERS", 4))
+# Longest a page waits on an in-flight prefetch before fetching synchronously itself
+WAIT_TIMEOUT = float(os.environ.get("PREFETCH_WAIT_TIMEOUT", 30))
+
+
+class Prefetcher:
+    def __init__(self, workers=WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self.inflight = {}  # key -> future
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn):
+        """Starts `fn` in the background unless a load for `key` is already in flight; returns its future."""
+        with self._lock:
+            future = self.inflight.get(key)
+            if future is not None:
+                return future
+            future = self.inflight[key] = self.executor.submit(fn)
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self.inflight.get(key) is future:
+                del self.inflight[key]
+
+    def pending(self, key):
+        with self._lock:
+            return key in self.inflight
+
+    def wait(self, key, timeout=WAIT_TIMEOUT):
+        """
+        Waits for the in-flight load of `key`, if any. Returns True if one finished successfully,
+        False if there was none or it was cancelled, failed or timed out.
+        """
+        with self._lock:
+            future = self.inflight.get(key)
+        if future is None:
+            return False
+        try:
+            future.result(timeout=timeout)
+        except (CancelledError, TimeoutError):
+            return False
+        except Exception as e:  # The caller's synchronous fetch will surface real errors
+            logger.warning("Prefetch of %s failed: %s", key, e)
+            return False
+        return True
+
+    def cancel(self, keys):
+        """Cancels loads that haven't started yet; running ones finish and still warm the cache."""
+        cancelled = 0
+        with self._lock:
+            futures = [(key, self.inflight.get(key)) for key in keys]
+        for key, future in futures:
+            if future is not None and future.cancel():
+                self._forget(key, future)
+                cancelled += 1
+        return cancelled
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
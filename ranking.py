@@ -0,0 +1,255 @@
+"""
+Local resume-to-job pre-ranking.
+
+Keeps a sparse TF-IDF matrix over each user's saved jobs (title, company and the bullet-parsed
+`job_skills_required` text) and scores a resume against every job with one vectorized pass.
+Scores blend TF-IDF cosine similarity with the share of the job's listed skills found in the
+resume, mirroring the backend's keyword and skill-compatibility components (it has no BERT part).
+"""
+import io
+import logging
+import re
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or such that the their this to
+with will you your we our us including other others etc e.g i.e using use proficient experience
+knowledge understanding strong ability skills skill familiarity familiar good excellent
+""".split())
+# Weight of TF-IDF similarity vs. skill coverage in the local score
+TFIDF_WEIGHT = 0.5
+
+RESULT_COLUMNS = ["job_id", "position", "company", "similarity_score", "compatible_skills", "missing_skills"]
+
+
+def tokenize(text):
+    return [token for token in TOKEN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+def parse_skills(skills_text):
+    """Skill names from the scraper's "- Skill: description" bullet lines."""
+    skills = []
+    for line in str(skills_text or "").splitlines():
+        line = line.strip().lstrip("-•*").strip()
+        if ":" in line:
+            name = line.split(":", 1)[0].strip()
+            if name and len(name) <= 60:
+                skills.append(name)
+    return skills
+
+
+def extract_pdf_text(pdf_bytes):
+    """Text of a PDF, or None when pypdf is not installed or the file can't be read."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    try:
+        reader = PdfReader(io.BytesIO(pdf_bytes))
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+    except Exception as e:
+        logger.warning("Could not extract the resume text: %s", e)
+        return None
+
+
+class SyncedIndex:
+    """
+    Base for the per-user job indexes, kept in step with the saved job set.
+
+    Subclasses set `lock` and `version` and implement `indexed()` (the job IDs held), `add(jobs)`
+    and `remove(job_ids)`; `sync` then only adds and removes the jobs that changed.
+    """
+
+    def indexed(self):
+        raise NotImplementedError
+
+    def sync(self, jobs, version=None):
+        """Incrementally matches the index to the user's current jobs frame (a no-op if `version` is unchanged)."""
+        with self.lock:
+            if version is not None and version == self.version:
+                return self
+            job_ids = jobs["job_id"].tolist()
+            indexed = self.indexed()
+            current = set(job_ids)
+            self.remove([job_id for job_id in indexed if job_id not in current])
+            new = [position for position, job_id in enumerate(job_ids) if job_id not in indexed]
+            if new:
+                self.add(jobs.iloc[new])
+            self.version = version
+        return self
+
+
+class RankingIndex(SyncedIndex):
+    """
+    Append-only sparse term matrix over a user's jobs, with tombstones for deleted jobs.
+
+    Rows are stored as flat (doc, term, tf) arrays. IDF and row norms are recomputed lazily with
+    bincount after the job set changes, which is cheap next to re-tokenizing everything.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None  # Job-set version the rows were last synced to
+        self.vocab = {}
+        self.job_ids = []
+        self.positions = []
+        self.companies = []
+        self.row_of = {}  # job_id -> row
+        self.entry_doc = np.empty(0, dtype=np.int64)
+        self.entry_term = np.empty(0, dtype=np.int64)
+        self.entry_tf = np.empty(0, dtype=np.float64)
+        self.alive = np.empty(0, dtype=bool)
+        # Skills as (row, skill id) pairs over a shared skill vocabulary
+        self.skill_names = []
+        self.skill_tokens = []
+        self.skill_vocab = {}
+        self.pair_doc = np.empty(0, dtype=np.int64)
+        self.pair_skill = np.empty(0, dtype=np.int64)
+        self._weights = None
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def nbytes(self):
+        """Approximate memory held by the index (arrays, vocabularies and per-job lists)."""
+        arrays = (self.entry_doc, self.entry_term, self.entry_tf, self.alive, self.pair_doc, self.pair_skill)
+        tables = (self.vocab, self.job_ids, self.positions, self.companies, self.row_of, self.skill_names, self.skill_tokens, self.skill_vocab)
+        return sum(array.nbytes for array in arrays) + sum(sys.getsizeof(table) for table in tables) + sum(sys.getsizeof(token) for token in self.vocab)
+
+    def _term_id(self, token):
+        term = self.vocab.get(token)
+        if term is None:
+            term = self.vocab[token] = len(self.vocab)
+        return term
+
+    def _skill_id(self, name):
+        key = " ".join(tokenize(name))
+        skill = self.skill_vocab.get(key)
+        if skill is None:
+            skill = self.skill_vocab[key] = len(self.skill_names)
+            self.skill_names.append(name)
+            self.skill_tokens.append(key)
+        return skill
+
+    def add(self, jobs):
+        """Adds rows for a frame with job_id, job_title, company_name and job_skills_required."""
+        docs, terms, tfs, pair_docs, pair_skills = [], [], [], [], []
+        for job_id, title, company, skills_text in zip(jobs["job_id"], jobs["job_title"], jobs["company_name"], jobs["job_skills_required"]):
+            if job_id in self.row_of:
+                continue
+            row = len(self.job_ids)
+            self.row_of[job_id] = row
+            self.job_ids.append(job_id)
+            self.positions.append(title)
+            self.companies.append(company)
+
+            counts = {}
+            for token in tokenize(f"{title} {title} {skills_text}"):
+                term = self._term_id(token)
+                counts[term] = counts.get(term, 0) + 1
+            docs.extend([row] * len(counts))
+            terms.extend(counts.keys())
+            tfs.extend(1 + np.log(list(counts.values())))  # Sublinear tf
+
+            skill_ids = {self._skill_id(name) for name in parse_skills(skills_text)}
+            skill_ids.discard(self.skill_vocab.get(""))
+            pair_docs.extend([row] * len(skill_ids))
+            pair_skills.extend(skill_ids)
+
+        added = len(self.job_ids) - len(self.alive)
+        if not added:
+            return
+        self.entry_doc = np.concatenate([self.entry_doc, np.asarray(docs, dtype=np.int64)])
+        self.entry_term = np.concatenate([self.entry_term, np.asarray(terms, dtype=np.int64)])
+        self.entry_tf = np.concatenate([self.entry_tf, np.asarray(tfs, dtype=np.float64)])
+        self.pair_doc = np.concatenate([self.pair_doc, np.asarray(pair_docs, dtype=np.int64)])
+        self.pair_skill = np.concatenate([self.pair_skill, np.asarray(pair_skills, dtype=np.int64)])
+        self.alive = np.concatenate([self.alive, np.ones(added, dtype=bool)])
+        self._weights = None
+
+    def indexed(self):
+        return self.row_of
+
+    def remove(self, job_ids):
+        for job_id in job_ids:
+            row = self.row_of.pop(job_id, None)
+            if row is not None:
+                self.alive[row] = False
+                self._weights = None
+
+    def _entry_weights(self):
+        """TF-IDF weight per stored entry (0 for deleted jobs) and each row's L2 norm."""
+        if self._weights is None:
+            live = self.alive[self.entry_doc]
+            n_docs = max(len(self), 1)
+            df = np.bincount(self.entry_term[live], minlength=len(self.vocab))
+            idf = np.log((1 + n_docs) / (1 + df)) + 1
+            weights = np.where(live, self.entry_tf * idf[self.entry_term], 0.0)
+            norms = np.sqrt(np.bincount(self.entry_doc, weights=weights ** 2, minlength=len(self.job_ids)))
+            self._weights = (idf, weights, norms)
+        return self._weights
+
+    def score(self, resume_text, top_k=None, exclude=()):
+        """Ranks every live job not in `exclude` against the resume; returns the top_k rows (all if None), best first."""
+        with self.lock:
+            return self._score(resume_text, top_k, exclude)
+
+    def _score(self, resume_text, top_k, exclude):
+        candidates = self.alive.copy()
+        candidates[[self.row_of[job_id] for job_id in exclude if job_id in self.row_of]] = False
+        n_candidates = int(candidates.sum())
+        if not n_candidates:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+        idf, weights, norms = self._entry_weights()
+
+        # Resume vector over the job vocabulary (unknown terms can't match anything)
+        counts = {}
+        for token in tokenize(resume_text):
+            term = self.vocab.get(token)
+            if term is not None:
+                counts[term] = counts.get(term, 0) + 1
+        query = np.zeros(len(self.vocab))
+        if counts:
+            terms = np.fromiter(counts.keys(), dtype=np.int64)
+            query[terms] = (1 + np.log(np.fromiter(counts.values(), dtype=np.float64))) * idf[terms]
+            query /= np.linalg.norm(query)
+        cosine = np.bincount(self.entry_doc, weights=weights * query[self.entry_term], minlength=len(self.job_ids))
+        cosine = np.divide(cosine, norms, out=np.zeros_like(cosine), where=norms > 0)
+
+        # Skill coverage: match each distinct skill once, then count per job
+        resume_tokens = f" {' '.join(tokenize(resume_text))} "
+        matched = np.fromiter((bool(key) and f" {key} " in resume_tokens for key in self.skill_tokens), dtype=bool, count=len(self.skill_tokens))
+        pair_matched = matched[self.pair_skill] if len(self.pair_skill) else np.empty(0, dtype=bool)
+        listed = np.bincount(self.pair_doc, minlength=len(self.job_ids))
+        found = np.bincount(self.pair_doc, weights=pair_matched, minlength=len(self.job_ids))
+        coverage = np.divide(found, listed, out=np.zeros(len(self.job_ids)), where=listed > 0)
+
+        scores = np.where(listed > 0, TFIDF_WEIGHT * cosine + (1 - TFIDF_WEIGHT) * coverage, cosine)
+        scores[~candidates] = -1
+        k = n_candidates if top_k is None else min(top_k, n_candidates)
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[candidates[top]]
+
+        # Pairs are appended in row order, so each row's skills are a contiguous slice
+        starts = np.searchsorted(self.pair_doc, top)
+        ends = np.searchsorted(self.pair_doc, top, side="right")
+        rows = []
+        for row, pair_start, pair_end in zip(top, starts, ends):
+            skills = self.pair_skill[pair_start:pair_end]
+            rows.append({
+                "job_id": self.job_ids[row],
+                "position": self.positions[row],
+                "company": self.companies[row],
+                "similarity_score": float(scores[row]),
+                "compatible_skills": ", ".join(self.skill_names[s] for s in skills if matched[s]),
+                "missing_skills": ", ".join(self.skill_names[s] for s in skills if not matched[s]),
+            })
+        return pd.DataFrame(rows, columns=RESULT_COLUMNS)
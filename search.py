@@ -0,0 +1,265 @@
+"""
+In-process full-text search and skill facets over a user's saved listings.
+
+`SearchIndex` keeps postings (term -> job IDs) over title, company, experience level and the
+bullet-parsed `job_skills_required` text, so a query is a few set operations instead of string
+matching over every row. Queries support AND (also "," or juxtaposition), OR, NOT / "-", quoted
+phrases (adjacent words within one field), parentheses, trailing-"*" prefixes and field qualifiers such as `skill:java` or
+`level:senior`, e.g. "Java AND Spring, not senior".
+"""
+import bisect
+import re
+import sys
+import threading
+from collections import Counter
+
+import pandas as pd
+
+from ranking import SyncedIndex, parse_skills, tokenize
+
+# Query field qualifiers -> indexed column
+FIELDS = {
+    "title": "job_title",
+    "company": "company_name",
+    "level": "job_experience_level",
+    "skill": "job_skills_required",
+}
+QUERY_TOKEN = re.compile(r'"[^"]*"|[(),]|[^\s(),"]+')
+
+
+class QueryError(ValueError):
+    pass
+
+
+class SearchIndex(SyncedIndex):
+    """Postings over a user's jobs; rebuilt per job-set version only for the jobs that changed."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None  # Job-set version the postings were last synced to
+        self.postings = {}  # term or "field:term" -> set of job IDs
+        self.skills = {}  # skill key -> set of job IDs
+        self.skill_names = {}  # skill key -> display name
+        self.terms_of = {}  # job_id -> (indexed field values, skill keys), for removal and facets
+        self._skill_key_of = {}  # skill name -> key
+        self._vocab = None  # Sorted terms for prefix queries
+
+    def __len__(self):
+        return len(self.terms_of)
+
+    def nbytes(self):
+        """Approximate memory held by the postings and per-job entries (field values are shared with the store)."""
+        postings = sum(sys.getsizeof(term) + sys.getsizeof(matches) for term, matches in self.postings.items())
+        skills = sum(sys.getsizeof(matches) for matches in self.skills.values())
+        return postings + skills + sys.getsizeof(self.postings) + sys.getsizeof(self.terms_of) + len(self.terms_of) * 200
+
+    @property
+    def job_ids(self):
+        return self.terms_of.keys()
+
+    def indexed(self):
+        return self.terms_of
+
+    def add(self, jobs):
+        """Indexes a frame with job_id and the FIELDS columns."""
+        # Titles, companies, levels and skill lists repeat across jobs, so each distinct value is
+        # tokenized once and its job IDs are added to the postings in bulk
+        groups = {field: {} for field in FIELDS}
+        for job_id, *values in zip(jobs["job_id"].tolist(), *(jobs[column].tolist() for column in FIELDS.values())):
+            if job_id in self.terms_of:
+                continue
+            # Interned, the skills text is shared with JobStore's pool rather than copied
+            values[-1] = sys.intern(values[-1]) if isinstance(values[-1], str) else ""
+            self.terms_of[job_id] = (tuple(values), self._skill_keys(values[-1]))
+            for field, value in zip(FIELDS, values):
+                groups[field].setdefault(value, []).append(job_id)
+        for field, values in groups.items():
+            for value, job_ids in values.items():
+                for term in self._field_terms(field, value):
+                    self.postings.setdefault(term, set()).update(job_ids)
+        for value, job_ids in groups["skill"].items():
+            for key in self.terms_of[job_ids[0]][1]:
+                self.skills.setdefault(key, set()).update(job_ids)
+        self._vocab = None
+
+    def _field_terms(self, field, value):
+        tokens = set(tokenize(value or ""))
+        return tokens | {f"{field}:{token}" for token in tokens}
+
+    def _skill_keys(self, skills_text):
+        keys = set()
+        for name in parse_skills(skills_text):
+            key = self._skill_key_of.get(name)
+            if key is None:
+                key = self._skill_key_of[name] = " ".join(tokenize(name))
+                self.skill_names.setdefault(key, name)
+            if key:
+                keys.add(key)
+        return frozenset(keys)
+
+    def remove(self, job_ids):
+        for job_id in job_ids:
+            entry = self.terms_of.pop(job_id, None)
+            if entry is None:
+                continue
+            values, skill_keys = entry
+            terms = set().union(*(self._field_terms(field, value) for field, value in zip(FIELDS, values)))
+            for postings, keys in ((self.postings, terms), (self.skills, skill_keys)):
+                for key in keys:
+                    matches = postings.get(key)
+                    if matches is None:
+                        continue
+                    matches.discard(job_id)
+                    if not matches:
+                        del postings[key]
+            self._vocab = None
+
+    def search(self, query="", skills=()):
+        """Job IDs matching the query and all of the given skill keys (every job if both are empty)."""
+        with self.lock:
+            matches = _Parser(self, query).parse() if query.strip() else set(self.terms_of)
+            return self.narrow(matches, skills)
+
+    def narrow(self, job_ids, skills):
+        """The job IDs that list all of the given skill keys."""
+        with self.lock:
+            for key in skills:
+                job_ids = job_ids & self.skills.get(key, set())
+            return job_ids
+
+    def facets(self, job_ids=None, limit=None):
+        """Skill counts over the given job IDs (all jobs if None), most common first."""
+        with self.lock:
+            if job_ids is None:
+                counts = Counter({key: len(matches) for key, matches in self.skills.items()})
+            else:
+                counts = Counter(key for job_id in job_ids if job_id in self.terms_of for key in self.terms_of[job_id][1])
+            return [(key, self.skill_names[key], count) for key, count in counts.most_common(limit)]
+
+    def _term(self, term):
+        if term.endswith("*"):
+            prefix = term[:-1]
+            if self._vocab is None:
+                self._vocab = sorted(self.postings)
+            start = bisect.bisect_left(self._vocab, prefix)
+            matches = set()
+            for candidate in self._vocab[start:]:
+                if not candidate.startswith(prefix):
+                    break
+                matches |= self.postings[candidate]
+            return matches
+        return self.postings.get(term, set())
+
+    def match_word(self, word, phrase=False):
+        """Jobs containing every token of a (possibly field-qualified or prefixed) word; with `phrase`, as
+        adjacent tokens in one field."""
+        field, _, text = word.rpartition(":") if ":" in word and word.split(":", 1)[0] in FIELDS else ("", "", word)
+        prefix = text.endswith("*")
+        tokens = tokenize(text)
+        if not tokens:
+            return set(self.terms_of)  # Stopwords and punctuation don't narrow the search
+        if prefix:
+            tokens[-1] += "*"
+        matches = None
+        for token in tokens:
+            found = self._term(f"{field}:{token}" if field else token)
+            matches = found if matches is None else matches & found
+            if not matches:
+                break
+        if phrase and len(tokens) > 1 and matches:
+            # Postings don't keep positions, so the few jobs holding every token are checked for the run
+            columns = [list(FIELDS).index(field)] if field else range(len(FIELDS))
+            matches = {
+                job_id for job_id in matches
+                if any(_contains_run(tokenize(self.terms_of[job_id][0][column] or ""), tokens) for column in columns)
+            }
+        return set(matches)
+
+
+class _Parser:
+    """Recursive-descent parser: expr := and ("OR" and)*; and := unary (["AND" | ","] unary)*."""
+
+    def __init__(self, index, query):
+        self.index = index
+        self.tokens = QUERY_TOKEN.findall(query)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def parse(self):
+        matches = self.expr()
+        if self.peek() is not None:
+            raise QueryError(f"Unexpected '{self.peek()}'")
+        return matches
+
+    def expr(self):
+        matches = self.conjunction()
+        while self.peek() is not None and self.peek().lower() == "or":
+            self.next()
+            matches = matches | self.conjunction()
+        return matches
+
+    def conjunction(self):
+        matches = self.unary()
+        while True:
+            token = self.peek()
+            if token is None or token == ")" or token.lower() == "or":
+                return matches
+            if token == "," or token.lower() == "and":
+                self.next()
+                continue
+            matches = matches & self.unary()
+
+    def unary(self):
+        token = self.peek()
+        if token is None:
+            raise QueryError("Incomplete query")
+        if token.lower() == "not":
+            self.next()
+            return set(self.index.terms_of) - self.unary()
+        if token.startswith("-") and len(token) > 1:
+            self.tokens[self.position] = token[1:]
+            return set(self.index.terms_of) - self.unary()
+        return self.atom()
+
+    def atom(self):
+        token = self.next()
+        if token == "(":
+            matches = self.expr()
+            if self.next() != ")":
+                raise QueryError("Missing ')'")
+            return matches
+        if token in (")", ","):
+            raise QueryError(f"Unexpected '{token}'")
+        return self.index.match_word(token.strip('"'), phrase=token.startswith('"'))
+
+
+def _contains_run(tokens, run):
+    """Whether `run` occurs as consecutive tokens, its last one a prefix if it ends with "*"."""
+    *head, last = run
+    prefix = last.endswith("*")
+    last = last.rstrip("*")
+    for start in range(len(tokens) - len(run) + 1):
+        end = start + len(head)
+        if tokens[start:end] == head and (tokens[end].startswith(last) if prefix else tokens[end] == last):
+            return True
+    return False
+
+
+def skill_facet_options(index, facets, selected=()):
+    """Facet (key, name, count) triples as a {key: label} mapping for a multiselect, keeping selected skills as options."""
+    options = {key: f"{name} ({count})" for key, name, count in facets}
+    for key in selected:
+        options.setdefault(key, f"{index.skill_names.get(key, key)} (0)")
+    return options
+
+
+def filter_frame(df, job_ids, column="job_id"):
+    """Rows of df whose job ID is in job_ids, in their original order."""
+    return df[pd.Series([job_id in job_ids for job_id in df[column].tolist()], index=df.index)]
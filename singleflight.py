@@ -0,0 +1,124 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls with the same key share one execution: the first caller runs it and the others
+wait for its result (or error). A successful result also stays shareable for `window` seconds
+after it finishes, which limits each key to one upstream call per window. That covers
+double-clicks and the rerun right after a slow call.
+"""
+import threading
+import time
+
+from tracing import tracer
+
+
+class Abandoned(Exception):
+    """Raised to followers of a stream whose leading reader stopped before the end."""
+
+
+class _Flight:
+    __slots__ = ("cond", "chunks", "done", "result", "error", "finished_at")
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.chunks = []  # Items streamed so far (stream flights only)
+        self.done = False
+        self.result = None
+        self.error = None
+        self.finished_at = None
+
+
+class SingleFlight:
+    def __init__(self, name, window=0.0, timer=time.monotonic):
+        self.name = name
+        self.window = window
+        self.timer = timer
+        self.flights = {}  # key -> in-flight or recently finished _Flight
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+
+    def _join(self, key):
+        """Returns (flight, leader): the flight to follow, or a new one the caller must run."""
+        with self._lock:
+            now = self.timer()
+            for stale in [k for k, f in self.flights.items() if f.done and now - f.finished_at >= self.window]:
+                del self.flights[stale]
+            flight = self.flights.get(key)
+            if flight is not None:
+                self.shared += 1
+                return flight, False
+            flight = self.flights[key] = _Flight()
+            self.calls += 1
+            return flight, True
+
+    def _finish(self, key, flight, result=None, error=None):
+        with flight.cond:
+            flight.result, flight.error, flight.done = result, error, True
+            flight.finished_at = self.timer()
+            flight.cond.notify_all()
+        if error is not None or not self.window:
+            # Failures are never shared after the fact; callers retry on their own
+            with self._lock:
+                if self.flights.get(key) is flight:
+                    del self.flights[key]
+
+    def do(self, key, fn):
+        """Returns `fn()`, sharing the result with concurrent (and, within the window, later) calls for `key`."""
+        flight, leader = self._join(key)
+        if leader:
+            try:
+                result = fn()
+            except BaseException as e:
+                self._finish(key, flight, error=e)
+                raise
+            self._finish(key, flight, result=result)
+            return result
+        with tracer.span(f"{self.name} coalesced"):
+            with flight.cond:
+                flight.cond.wait_for(lambda: flight.done)
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def stream(self, key, fn):
+        """Yields the items of `fn()`; concurrent callers for `key` replay them as the leader receives them."""
+        flight, leader = self._join(key)
+        if leader:
+            try:
+                for item in fn():
+                    with flight.cond:
+                        flight.chunks.append(item)
+                        flight.cond.notify_all()
+                    yield item
+            except GeneratorExit:
+                # The leader's reader stopped early; followers can't get the rest of the stream
+                self._finish(key, flight, error=Abandoned(f"{self.name}: shared stream abandoned"))
+                raise
+            except BaseException as e:
+                self._finish(key, flight, error=e)
+                raise
+            self._finish(key, flight)
+            return
+        with tracer.span(f"{self.name} coalesced stream"):
+            position = 0
+            while True:
+                with flight.cond:
+                    flight.cond.wait_for(lambda: flight.done or len(flight.chunks) > position)
+                    items, done = flight.chunks[position:], flight.done
+                position += len(items)
+                yield from items
+                if done and position == len(flight.chunks):
+                    break
+        if flight.error is not None:
+            raise flight.error
+
+    def forget(self, predicate):
+        """Stops sharing results for keys satisfying `predicate` (e.g. after a write); running calls finish normally."""
+        with self._lock:
+            for key in [k for k in self.flights if predicate(k)]:
+                del self.flights[key]
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": sum(not f.done for f in self.flights.values())}
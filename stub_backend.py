@@ -0,0 +1,196 @@
+"""
+Local stand-in for the job and skills backends.
+
+Implements the resume transfer protocol the client uses (HEAD/PUT /resumes/<sha256>, then
+`resume_sha256` in request payloads, answered with 410 when the hash is unknown), the optional
+`job_ids` subset of /get_similarity (see SIMILARITY_JOB_IDS in backend.py) and canned
+responses for /get_similarity, /generate_cover_letter and /get_skills_recommendation. It counts
+the request bytes it receives per path (GET /stats), so payload sizes can be compared, and can be
+told to fail a path's next requests (`StubState.fail`) or every cover letter for some jobs
+(`StubState.failing_jobs`) to exercise client and batch retries.
+
+    python stub_backend.py [--port 5000] [--legacy]
+
+then point JOB_BACKEND_URL and SKILLS_BACKEND_URL at http://127.0.0.1:5000.
+"""
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RESUME_PREFIX = "/resumes/"
+
+
+class StubState:
+    def __init__(self, legacy=False):
+        self.legacy = legacy  # Without the resume transfer endpoints, like the current backends
+        self.resumes = {}  # sha256 -> PDF bytes
+        self.request_bytes = Counter()  # path -> request body bytes received
+        self.requests = Counter()  # (method, path) -> count
+        self.failures = {}  # path -> statuses to answer its next requests with
+        self.failing_jobs = set()  # Job IDs whose cover letters are always refused (422)
+        self.lock = threading.Lock()
+
+    def fail(self, path, *statuses):
+        """Answers the next requests to `path` with `statuses`, in order, before serving it normally."""
+        with self.lock:
+            self.failures.setdefault(path, []).extend(statuses)
+
+    def next_failure(self, path):
+        with self.lock:
+            statuses = self.failures.get(path)
+            return statuses.pop(0) if statuses else None
+
+    def record(self, method, path, size):
+        with self.lock:
+            key = RESUME_PREFIX if path.startswith(RESUME_PREFIX) else path
+            self.request_bytes[key] += size
+            self.requests[f"{method} {key}"] += 1
+
+    def stats(self):
+        with self.lock:
+            return {"request_bytes": dict(self.request_bytes), "requests": dict(self.requests), "resumes": len(self.resumes)}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    state = None  # Set per server by `serve`
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.state.record(self.command, self.path, len(body))
+        return body
+
+    def _failed(self):
+        """Sends an injected failure for this request, if one is queued; returns whether it did."""
+        status = self.state.next_failure(self.path)
+        if status is None:
+            return False
+        self._json(status, {"error": "injected failure"})
+        return True
+
+    def _send(self, status, body=b"", content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _json(self, status, payload):
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+    def _resume_digest(self):
+        if self.state.legacy or not self.path.startswith(RESUME_PREFIX):
+            return None
+        return self.path[len(RESUME_PREFIX):]
+
+    def do_HEAD(self):
+        digest = self._resume_digest()
+        self._body()
+        if not self._failed():
+            self._send(200 if digest in self.state.resumes else 404)
+
+    def do_PUT(self):
+        digest = self._resume_digest()
+        body = self._body()
+        if self._failed():
+            return
+        if digest is None:
+            return self._send(404)
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        if hashlib.sha256(body).hexdigest() != digest:
+            return self._json(400, {"error": "resume does not match its hash"})
+        with self.state.lock:
+            self.state.resumes[digest] = body
+        self._send(201)
+
+    def do_GET(self):
+        self._body()
+        if self.path == "/stats":
+            return self._json(200, self.state.stats())
+        self._send(404)
+
+    def do_POST(self):
+        body = self._body()
+        if self._failed():
+            return
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return self._json(400, {"error": "invalid JSON"})
+        handler = {
+            "/get_similarity": self._similarity,
+            "/generate_cover_letter": self._cover_letter,
+            "/get_skills_recommendation": self._skills,
+        }.get(self.path)
+        if handler is None:
+            return self._send(404)
+        resume = self._resume(payload)
+        if resume is None:
+            return self._json(410 if "resume_sha256" in payload else 400, {"error": "resume missing"})
+        handler(payload, resume)
+
+    def _resume(self, payload):
+        if "resume_sha256" in payload and not self.state.legacy:
+            return self.state.resumes.get(payload["resume_sha256"])
+        if "resume_contents" in payload:
+            return base64.b64decode(payload["resume_contents"])
+        return None
+
+    def _similarity(self, payload, resume):
+        # Without job_ids the real backend scores every saved job; the stub has none, so it makes some up
+        job_ids = payload.get("job_ids") or [f"stub-{i}" for i in range(3)]
+        self._json(200, {"result": [{
+            "job_id": job_id,
+            "position": f"Position {job_id}",
+            "company": "Stub Company",
+            "similarity_score": int(hashlib.sha256(str(job_id).encode()).hexdigest()[:4], 16) / 0xFFFF,
+            "compatible_skills": "Python, SQL",
+            "missing_skills": "Kubernetes",
+        } for job_id in job_ids]})
+
+    def _events(self, events):
+        body = "".join(
+            (f"event: {event}\n" if event != "message" else "") + f"data: {data}\n\n" for event, data in events
+        ).encode("utf-8")
+        self._send(200, body, "text/event-stream")
+
+    def _cover_letter(self, payload, resume):
+        if payload.get("job_id") in self.state.failing_jobs:
+            return self._json(422, {"error": "cannot write a cover letter for this job"})
+        self._events([("message", f"Dear hiring manager for job {payload.get('job_id')},"),
+                      ("message", f" my resume is {len(resume)} bytes.")])
+
+    def _skills(self, payload, resume):
+        context = [{"title": f"What does a {payload.get('job_occupation')} do?", "link": "https://example.com/occupation"}]
+        self._events([("context", json.dumps(context)),
+                      ("message", "- Skill: Communication")])
+
+
+def serve(port=0, legacy=False):
+    """Starts the stub on a background thread; returns (server, state). `server.server_port` is the bound port."""
+    state = StubState(legacy)
+    handler = type("Handler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--legacy", action="store_true", help="serve without the resume transfer endpoints")
+    args = parser.parse_args()
+    server, _ = serve(args.port, args.legacy)
+    print(f"Stub backend on http://127.0.0.1:{server.server_port}")
+    threading.Event().wait()
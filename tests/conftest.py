@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import memory_db  # noqa: E402
+from backend import BackendClient  # noqa: E402
+from stub_backend import serve  # noqa: E402
+
+
+class Clock:
+    """Injectable timer that only moves when a test sets `now`."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def stub():
+    """A stub backend on a free port; yields (base URL, StubState)."""
+    server, state = serve()
+    yield f"http://127.0.0.1:{server.server_port}", state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps():
+    """Backoff delays a client slept for, in order (without actually sleeping)."""
+    return []
+
+
+@pytest.fixture
+def client(stub, sleeps):
+    url, _ = stub
+    client = BackendClient(url, dedup_window=0, sleep=sleeps.append)
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def data_client():
+    """A MemoryClient holding 50 synthetic jobs for user "u" * 64."""
+    client = memory_db.MemoryClient()
+    memory_db.seed_synthetic(client, "u" * 64, 50, seed=1)
+    return client
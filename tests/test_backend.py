@@ -0,0 +1,133 @@
+import pytest
+
+from backend import RESUME_PATH, BackendClient, BackendError, _parse_sse
+from stub_backend import serve
+
+PDF = b"%PDF-1.4 resume " * 64
+
+
+def test_retries_5xx_with_backoff_then_succeeds(stub, client, sleeps):
+    _, state = stub
+    state.fail("/get_similarity", 503, 502)
+    result = client.post_resume("/get_similarity", {"user_id": "u"}, PDF)["result"]
+    assert len(result) == 3
+    assert state.stats()["requests"]["POST /get_similarity"] == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= client.backoff and 0 <= sleeps[1] <= client.backoff * 2
+
+
+def test_gives_up_after_max_retries(stub, client, sleeps):
+    _, state = stub
+    state.fail("/get_similarity", *[503] * (client.max_retries + 1))
+    with pytest.raises(BackendError) as error:
+        client.post_resume("/get_similarity", {"user_id": "u"}, PDF)
+    assert error.value.status_code == 503
+    assert len(sleeps) == client.max_retries
+
+
+def test_client_errors_are_not_retried(stub, client, sleeps):
+    _, state = stub
+    state.fail("/get_similarity", 400)
+    with pytest.raises(BackendError) as error:
+        client.post_resume("/get_similarity", {"user_id": "u"}, PDF)
+    assert error.value.status_code == 400
+    assert sleeps == []
+
+
+def test_retried_streams_release_their_connections(stub, client):
+    _, state = stub
+    state.fail("/generate_cover_letter", 503, 400)
+    closed, request = [], client.session.request
+
+    def tracked(method, url, **kwargs):
+        response = request(method, url, **kwargs)
+        close = response.close
+        response.close = lambda: closed.append((url.rsplit("/", 1)[-1], response.status_code)) or close()
+        return response
+
+    client.session.request = tracked
+    with pytest.raises(BackendError):
+        list(client.stream_resume("/generate_cover_letter", {"job_id": 1, "stream": True}, PDF))
+    assert [status for path, status in closed if path == "generate_cover_letter"] == [503, 400]
+
+
+def test_connection_errors_are_retried(sleeps):
+    client = BackendClient("http://127.0.0.1:9", max_retries=2, sleep=sleeps.append)
+    with pytest.raises(BackendError):
+        client.post("/get_similarity", {})
+    assert len(sleeps) == 2
+
+
+def test_backoff_is_capped_and_honours_retry_after(client):
+    assert all(0 <= client._delay(attempt) <= client.max_backoff for attempt in range(10))
+    assert client._delay(0, "3") == 3
+    assert client._delay(0, "600") == client.max_backoff
+    assert 0 <= client._delay(0, "Wed, 21 Oct 2015 07:28:00 GMT") <= client.backoff
+
+
+def test_resume_is_uploaded_once_and_sent_by_hash(stub, client):
+    _, state = stub
+    for _ in range(3):
+        client.post_resume("/get_similarity", {"user_id": "u"}, PDF)
+    requests = state.stats()["requests"]
+    assert requests["PUT /resumes/"] == 1
+    assert requests["POST /get_similarity"] == 3
+    assert list(client.latency_stats()) == [RESUME_PATH, "/get_similarity"]
+
+
+def test_resume_is_uploaded_again_when_the_backend_lost_it(stub, client):
+    _, state = stub
+    client.post_resume("/get_similarity", {"user_id": "u"}, PDF)
+    state.resumes.clear()
+    client.post_resume("/get_similarity", {"user_id": "u"}, PDF)
+    assert state.stats()["requests"]["PUT /resumes/"] == 2
+
+
+def test_legacy_backend_gets_the_resume_inline(sleeps):
+    server, state = serve(legacy=True)
+    try:
+        client = BackendClient(f"http://127.0.0.1:{server.server_port}", dedup_window=0, sleep=sleeps.append)
+        client.post_resume("/get_similarity", {"user_id": "u"}, PDF)
+        client.post_resume("/get_similarity", {"user_id": "u"}, PDF)
+        assert not client.resume_upload
+        assert state.stats()["requests"]["PUT /resumes/"] == 1
+        assert state.stats()["requests"]["POST /get_similarity"] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_parse_sse():
+    lines = [
+        "data: Dear",
+        "",
+        ": keep-alive",
+        "",
+        "data:  Hiring",
+        "data: Manager",
+        "",
+        "event: context",
+        'data: [{"title": "t"}]',
+        "",
+        "data: no trailing blank line",
+    ]
+    assert list(_parse_sse(lines)) == [
+        ("message", "Dear"),
+        ("message", " Hiring\nManager"),
+        ("context", '[{"title": "t"}]'),
+        ("message", "no trailing blank line"),
+    ]
+
+
+def test_stream_yields_sse_events(client):
+    events = list(client.stream_resume("/get_skills_recommendation", {"job_occupation": "Engineer", "stream": True}, PDF))
+    assert [event for event, _ in events] == ["context", "message"]
+    assert "Engineer" in events[0][1]
+
+
+def test_finished_streams_are_not_replayed(stub, sleeps):
+    url, state = stub
+    client = BackendClient(url, dedup_window=60, sleep=sleeps.append)
+    for _ in range(2):
+        list(client.stream_resume("/generate_cover_letter", {"job_id": 1, "stream": True}, PDF))
+    assert state.stats()["requests"]["POST /generate_cover_letter"] == 2
@@ -0,0 +1,73 @@
+import sys
+
+from cache import TTLCache
+
+
+def test_hits_and_misses(clock):
+    cache = TTLCache(timer=clock)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache and "b" not in cache
+    assert cache.get_or_set("b", lambda: 2) == 2
+    assert cache.get_or_set("b", lambda: 3) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 2, 2)
+
+
+def test_entries_expire_after_ttl_but_stay_peekable(clock):
+    cache = TTLCache(ttl=10, timer=clock)
+    cache.set("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    clock.now = 10
+    assert cache.get("a") is None
+    assert "a" not in cache
+    assert cache.peek("a") == 1
+    cache.set("a", 2)
+    assert cache.get("a") == 2
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(maxsize=2, timer=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.peek("b") is None
+    assert cache.peek("a") == 1 and cache.peek("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sizes_are_tracked_through_sets_evictions_and_invalidation(clock):
+    cache = TTLCache(maxsize=2, timer=clock, sizeof=len)
+    cache.set_many([("a", "x" * 10), ("b", "x" * 20)])
+    assert cache.nbytes == 30
+    cache.set("a", "x" * 5)
+    assert cache.nbytes == 25
+    cache.set("c", "x" * 1)  # Evicts "b"
+    assert cache.nbytes == 6
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert cache.nbytes == 1
+    cache.clear()
+    assert cache.nbytes == 0 and len(cache) == 0
+
+
+def test_resize_reestimates_a_value_mutated_in_place(clock):
+    cache = TTLCache(timer=clock, sizeof=sys.getsizeof)
+    value = []
+    cache.set("a", value)
+    before = cache.nbytes
+    value.extend(range(1000))
+    cache.resize("a")
+    assert cache.nbytes == sys.getsizeof(value) > before
+    cache.resize("missing")
+
+
+def test_invalidate_where_drops_matching_keys(clock):
+    cache = TTLCache(timer=clock, sizeof=len)
+    cache.set_many([(("u1", "jobs"), "abc"), (("u1", "version"), "v"), (("u2", "jobs"), "de")])
+    cache.invalidate_where(lambda key: key[0] == "u1")
+    assert len(cache) == 1 and cache.get(("u2", "jobs")) == "de"
+    assert cache.nbytes == 2
@@ -0,0 +1,43 @@
+import io
+import zipfile
+
+from cover_letters import ZipBuilder, generate_batch
+
+PDF = b"%PDF-1.4 resume " * 64
+
+
+def run(client, job_ids, **kwargs):
+    events = list(generate_batch(client, job_ids, PDF, backoff=0, **kwargs))
+    final = {job_id: (status, attempt, payload) for job_id, status, attempt, payload in events if status in ("done", "failed")}
+    return events, final
+
+
+def test_a_failing_job_does_not_stop_the_others(stub, client):
+    _, state = stub
+    state.failing_jobs.add("bad")
+    events, final = run(client, ["a", "bad", "b", "c"], retries=2)
+    assert {job_id for job_id, (status, _, _) in final.items() if status == "done"} == {"a", "b", "c"}
+    status, attempt, error = final["bad"]
+    assert (status, attempt) == ("failed", 2)
+    assert "422" in error
+    assert [attempt for job_id, status, attempt, _ in events if job_id == "bad" and status == "retrying"] == [1, 2]
+    assert state.stats()["requests"]["POST /generate_cover_letter"] == 3 + 3
+
+
+def test_a_job_that_fails_once_is_retried_on_its_own(stub, client):
+    _, state = stub
+    state.fail("/generate_cover_letter", 400)  # Only the first request fails
+    events, final = run(client, ["a", "b", "c"], workers=1, retries=2)
+    assert all(status == "done" for status, _, _ in final.values())
+    assert final["a"][1] == 1 and final["b"][1] == 0 and final["c"][1] == 0
+    assert [job_id for job_id, status, _, _ in events if status == "retrying"] == ["a"]
+
+
+def test_letters_end_up_in_the_zip(stub, client):
+    _, final = run(client, ["a", "b"])
+    archive = ZipBuilder()
+    for job_id, (_, _, docx) in sorted(final.items()):
+        archive.add(f"cover_letter_{job_id}.docx", docx)
+    assert archive.count == 2
+    with zipfile.ZipFile(io.BytesIO(archive.getvalue())) as zipped:
+        assert zipped.namelist() == ["cover_letter_a.docx", "cover_letter_b.docx"]
@@ -0,0 +1,80 @@
+import threading
+
+import db
+from db import JobStore
+
+USER = "u" * 64
+
+
+def test_reads_are_cached_until_a_write(data_client):
+    store = JobStore(data_client, dedup_window=0)
+    jobs = store.jobs(USER)
+    assert len(jobs) == 50
+    version = store.version(USER)
+    requests = data_client.requests
+    assert store.jobs(USER).equals(jobs)
+    assert store.version(USER) == version
+    assert data_client.requests == requests
+
+    store.delete_job(USER, jobs["job_id"].iloc[0])
+    assert len(store.jobs(USER)) == 49
+    assert store.version(USER) != version
+
+
+def test_username_is_cached_and_updated_on_write(data_client):
+    store = JobStore(data_client, dedup_window=0)
+    assert store.username(USER) == "Synthetic 50"
+    requests = data_client.requests
+    assert store.username(USER) == "Synthetic 50"
+    assert data_client.requests == requests
+    store.update_username(USER, "Renamed")
+    assert store.username(USER) == "Renamed"
+
+
+def test_sync_fetches_only_added_jobs(data_client, monkeypatch):
+    store = JobStore(data_client, dedup_window=0)
+    jobs = store.jobs(USER)
+    added = dict(data_client.tables["JOB"][jobs["job_id"].iloc[0]], job_id=f"{USER[:8]}-added")
+    data_client.insert_rows("JOB", [added])
+    data_client.insert_rows("USER_JOB", [{"user_id": USER, "job_id": added["job_id"]}])
+    fetched = []
+    fetch_jobs_by_id = db.fetch_jobs_by_id
+    monkeypatch.setattr(db, "fetch_jobs_by_id", lambda client, hashed_id, job_ids, **kwargs: fetched.append(list(job_ids)) or fetch_jobs_by_id(client, hashed_id, job_ids, **kwargs))
+
+    synced = store.sync(USER)
+    assert fetched[0] == [added["job_id"]]
+    assert len(synced) == 51
+    assert synced["job_id"].tolist()[:50] == jobs["job_id"].tolist()
+
+
+def test_concurrent_loads_share_one_query(data_client):
+    store = JobStore(data_client, dedup_window=0)
+    release, calls = threading.Event(), []
+    sync = store._sync
+
+    def slow_sync(hashed_id):
+        calls.append(hashed_id)
+        release.wait(5)
+        return sync(hashed_id)
+
+    store._sync = slow_sync
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.jobs(USER))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while store.flights.stats()["shared"] < 3:
+        release.wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert calls == [USER]
+    assert [len(jobs) for jobs in results] == [50] * 4
+
+
+def test_sync_keeps_its_own_flight_and_writes_forget_it(data_client):
+    store = JobStore(data_client, dedup_window=60)
+    store.sync(USER)
+    assert (USER, "sync") in store.flights.flights
+    store.delete_jobs(USER, store.jobs(USER)["job_id"].iloc[:2].tolist())
+    assert (USER, "sync") not in store.flights.flights
+    assert len(store.sync(USER)) == 48
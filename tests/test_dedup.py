@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from dedup import DuplicateIndex
+
+SKILLS = ["Java", "Python", "SQL", "Docker", "Kubernetes", "React", "Spring Boot", "AWS", "Kafka", "Spark"]
+
+
+def job(job_id, title, company, skills):
+    return (job_id, title, company, "\n".join(f"- {skill}: required for this role, with hands-on experience" for skill in skills))
+
+
+def frame(*rows):
+    return pd.DataFrame(list(rows), columns=["job_id", "job_title", "company_name", "job_skills_required"])
+
+
+@pytest.fixture
+def jobs():
+    return frame(
+        job("a1", "Backend Developer", "Acme", SKILLS[:6]),
+        job("b1", "Data Engineer", "Globex", SKILLS[4:]),
+        job("c1", "Frontend Developer", "Initech", ["React", "TypeScript", "CSS"]),
+        job("a2", "Backend Developer", "Acme", SKILLS[:6]),  # Exact repost
+        job("a3", "Backend Developer", "Acme", SKILLS[:5]),  # One requirement dropped
+    )
+
+
+def test_reposts_cluster_with_the_first_indexed_job(jobs):
+    index = DuplicateIndex().sync(jobs, 1)
+    assert index.clusters() == {"a1": "a1", "a2": "a1", "a3": "a1"}
+    assert index.duplicates() == {"a2", "a3"}
+    assert index.collapse(["c1", "a3", "a1", "b1", "a2"]) == (["c1", "a3", "b1"], {"a3": 2})
+
+
+def test_unchanged_version_is_a_no_op(jobs):
+    index = DuplicateIndex().sync(jobs, 1)
+    index.sync(jobs.iloc[:1], 1)
+    assert len(index) == len(jobs)
+
+
+def test_incremental_add_matches_a_full_build(jobs):
+    index = DuplicateIndex().sync(jobs.iloc[:3], 1)
+    assert index.clusters() == {}
+    index.sync(jobs, 2)
+    assert index.clusters() == DuplicateIndex().sync(jobs, 1).clusters()
+
+
+def test_removing_a_job_relinks_its_cluster(jobs):
+    index = DuplicateIndex().sync(jobs, 1)
+    index.clusters()
+    index.sync(jobs[jobs["job_id"] != "a1"], 2)
+    assert index.clusters() == {"a2": "a2", "a3": "a2"}
+    index.sync(jobs[~jobs["job_id"].isin(["a1", "a2"])], 3)
+    assert index.clusters() == {}
+
+
+def test_similarity_estimates_jaccard(jobs):
+    index = DuplicateIndex().sync(jobs, 1)
+    assert index.similarity("a1", "a2") == 1.0
+    assert index.similarity("a1", "c1") < 0.2
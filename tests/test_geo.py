@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from geo import LocationIndex, haversine_km
+
+
+def companies(lats, longs):
+    return pd.DataFrame({
+        "company_id": [f"c{i}" for i in range(len(lats))],
+        "company_lat": lats,
+        "company_long": longs,
+    })
+
+
+@pytest.fixture
+def locations():
+    rng = np.random.default_rng(0)
+    clustered = (3.14 + rng.normal(0, 0.3, 400), 101.69 + rng.normal(0, 0.3, 400))
+    spread = (rng.uniform(-80, 80, 200), rng.uniform(-180, 180, 200))
+    antimeridian = (rng.uniform(-20, 20, 100), np.concatenate([rng.uniform(175, 180, 50), rng.uniform(-180, -175, 50)]))
+    return companies(*(np.concatenate(parts) for parts in zip(clustered, spread, antimeridian)))
+
+
+def brute_force(df, lat, long):
+    return haversine_km(lat, long, df["company_lat"].to_numpy(), df["company_long"].to_numpy())
+
+
+QUERIES = [(3.14, 101.69), (0.0, 179.9), (0.0, -179.9), (10.0, 180.0), (85.0, 0.0), (-60.0, -120.0)]
+
+
+@pytest.mark.parametrize("lat, long", QUERIES)
+@pytest.mark.parametrize("radius_km", [1, 25, 500, 3000])
+def test_within_matches_brute_force(locations, lat, long, radius_km):
+    distances = brute_force(locations, lat, long)
+    expected = set(locations["company_id"][distances <= radius_km])
+    result = LocationIndex(locations).within(lat, long, radius_km)
+    assert set(result["company_id"]) == expected
+    assert result["distance_km"].is_monotonic_increasing
+
+
+@pytest.mark.parametrize("lat, long", QUERIES)
+@pytest.mark.parametrize("k", [1, 10, 250])
+def test_nearest_matches_brute_force(locations, lat, long, k):
+    distances = np.sort(brute_force(locations, lat, long))[:k]
+    result = LocationIndex(locations).nearest(lat, long, k)
+    assert len(result) == k
+    np.testing.assert_allclose(result["distance_km"].to_numpy(), distances)
+
+
+def test_nearest_returns_everything_when_k_exceeds_the_companies(locations):
+    assert len(LocationIndex(locations).nearest(0.0, 0.0, len(locations) + 10)) == len(locations)
+
+
+def test_empty_frame():
+    index = LocationIndex(companies([], []))
+    assert len(index) == 0
+    assert index.within(3.14, 101.69, 100).empty
+    assert index.nearest(3.14, 101.69, 5).empty
+
+
+def test_rows_without_coordinates_are_skipped():
+    df = companies([3.14, None], [101.69, 101.7])
+    assert list(LocationIndex(df).nearest(3.14, 101.69, 5)["company_id"]) == ["c0"]
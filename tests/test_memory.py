@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from cache import TTLCache
+from memory import MemoryBudget, estimate_bytes
+
+
+def test_estimate_bytes():
+    df = pd.DataFrame({"a": np.arange(1000, dtype=np.int64)})
+    assert estimate_bytes(df) >= 8000
+    assert estimate_bytes(np.zeros(100)) == 800
+    assert estimate_bytes(["x" * 100, b"y" * 100]) > 200
+
+    class Index:
+        def nbytes(self):
+            return 1234
+
+    assert estimate_bytes(Index()) == 1234
+
+
+def budget_over(clock, sizes, limit):
+    """A budget over one cache holding a `sizes[user]`-byte value per user, touched in order."""
+    cache = TTLCache(sizeof=len, timer=clock)
+    budget = MemoryBudget(limit, timer=clock)
+    budget.register_cache(cache, owner=lambda key: key[0])
+    for user, size in sizes.items():
+        cache.set((user, "jobs"), "x" * size)
+        clock.now += 1
+        budget.touch(user)
+    return cache, budget
+
+
+def test_least_recently_active_users_are_evicted_until_within_budget(clock):
+    cache, budget = budget_over(clock, {"a": 400, "b": 400, "c": 400}, limit=900)
+    budget.touch("a")
+    assert budget.enforce() == ["b"]
+    assert (("b", "jobs") in cache, ("a", "jobs") in cache, ("c", "jobs") in cache) == (False, True, True)
+    assert budget.stats() == {"limit": 900, "usage": 800, "users": 2, "evictions": 1}
+
+
+def test_kept_users_are_never_evicted(clock):
+    cache, budget = budget_over(clock, {"a": 400, "b": 400, "c": 400}, limit=500)
+    assert budget.enforce(keep={"a"}) == ["b", "c"]
+    assert ("a", "jobs") in cache
+    assert budget.usage() == 400
+
+
+def test_nothing_is_evicted_within_budget_or_without_a_limit(clock):
+    _, budget = budget_over(clock, {"a": 400, "b": 400}, limit=1000)
+    assert budget.enforce() == []
+    _, unlimited = budget_over(clock, {"a": 400, "b": 400}, limit=0)
+    assert unlimited.enforce() == []
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from prefetch import Prefetcher
+
+
+@pytest.fixture
+def prefetcher():
+    prefetcher = Prefetcher(workers=1)
+    yield prefetcher
+    prefetcher.shutdown()
+
+
+def blocker(prefetcher):
+    """Occupies the single worker until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+    prefetcher.submit("blocker", lambda: started.set() or release.wait(5))
+    started.wait(5)
+    return release
+
+
+def test_one_load_per_key_while_in_flight(prefetcher):
+    release = blocker(prefetcher)
+    calls = []
+    first = prefetcher.submit(("u", "jobs"), lambda: calls.append(1))
+    assert prefetcher.submit(("u", "jobs"), lambda: calls.append(2)) is first
+    assert prefetcher.pending(("u", "jobs"))
+    release.set()
+    assert prefetcher.wait(("u", "jobs"))
+    assert calls == [1]
+    assert not prefetcher.pending(("u", "jobs"))
+    prefetcher.submit(("u", "jobs"), lambda: calls.append(3)).result(5)
+    assert calls == [1, 3]
+
+
+def test_cancel_drops_queued_loads_only(prefetcher):
+    release = blocker(prefetcher)
+    calls = []
+    prefetcher.submit(("u", "jobs"), lambda: calls.append("jobs"))
+    assert prefetcher.cancel([("u", "jobs"), ("u", "missing"), "blocker"]) == 1
+    assert not prefetcher.pending(("u", "jobs"))
+    assert prefetcher.pending("blocker")  # Already running
+    assert not prefetcher.wait(("u", "jobs"))
+    release.set()
+    assert prefetcher.wait("blocker")
+    assert calls == []
+
+
+def test_wait_reports_failures_and_timeouts(prefetcher):
+    assert not prefetcher.wait(("u", "never submitted"))
+    release = blocker(prefetcher)
+    assert not prefetcher.wait("blocker", timeout=0.01)
+    release.set()
+
+    def fail():
+        raise RuntimeError("load failed")
+
+    future = prefetcher.submit(("u", "jobs"), fail)
+    assert not prefetcher.wait(("u", "jobs"))
+    assert isinstance(future.exception(5), RuntimeError)
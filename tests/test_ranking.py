@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from ranking import RankingIndex
+
+COLUMNS = ["job_id", "job_title", "company_name", "job_skills_required"]
+JOBS = pd.DataFrame([
+    ("j1", "Java Developer", "Acme", "- Java: 5 years\n- Spring Boot: APIs\n- SQL: queries"),
+    ("j2", "Python Developer", "Globex", "- Python: scripting\n- Pandas: analysis\n- SQL: reporting"),
+    ("j3", "Frontend Engineer", "Initech", "- React: components\n- TypeScript: typing\n- CSS: layouts"),
+    ("j4", "Data Engineer", "Hooli", "- Python: ETL\n- Spark: pipelines\n- Kafka: streams"),
+], columns=COLUMNS)
+RESUME = "Backend developer. Five years of Java with Spring Boot microservices and SQL databases."
+
+
+def fresh(jobs):
+    return RankingIndex().sync(jobs, 1)
+
+
+def test_best_matches_come_first():
+    ranked = fresh(JOBS).score(RESUME)
+    assert ranked["job_id"].tolist()[0] == "j1"
+    assert ranked["similarity_score"].is_monotonic_decreasing
+    best = ranked.iloc[0]
+    assert best["compatible_skills"] == "Java, Spring Boot, SQL"
+    assert best["missing_skills"] == ""
+    assert ranked.set_index("job_id").loc["j3", "similarity_score"] == 0
+
+
+def test_top_k_and_exclude():
+    index = fresh(JOBS)
+    assert len(index.score(RESUME, top_k=2)) == 2
+    ranked = index.score(RESUME, exclude={"j1"})
+    assert "j1" not in ranked["job_id"].tolist()
+    assert ranked["job_id"].tolist()[0] == "j2"
+    assert index.score(RESUME, exclude=set(JOBS["job_id"])).empty
+
+
+def test_unchanged_version_is_a_no_op():
+    index = fresh(JOBS)
+    index.sync(JOBS.iloc[:1], 1)
+    assert len(index) == len(JOBS)
+
+
+@pytest.mark.parametrize("resume", [RESUME, "Python Spark Kafka pipelines", "React TypeScript"])
+def test_incremental_sync_scores_like_a_fresh_build(resume):
+    added = pd.DataFrame([("j5", "Java Engineer", "Umbrella", "- Java: services\n- Kafka: events")], columns=COLUMNS)
+    index = RankingIndex().sync(JOBS, 1)
+    current = pd.concat([JOBS[JOBS["job_id"] != "j2"], added], ignore_index=True)
+    index.sync(current, 2)
+    assert len(index) == len(current)
+    incremental = index.score(resume).set_index("job_id")["similarity_score"]
+    rebuilt = fresh(current).score(resume).set_index("job_id")["similarity_score"]
+    pd.testing.assert_series_equal(incremental.sort_index(), rebuilt.sort_index())
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from search import QueryError, SearchIndex
+
+JOBS = pd.DataFrame([
+    ("j1", "Senior Java Developer", "Acme", "Mid-Senior level", "- Java: 5 years\n- Spring Boot: APIs"),
+    ("j2", "Java Engineer", "Globex", "Entry level", "- Java: basics\n- SQL: queries"),
+    ("j3", "Python Developer", "Acme", "Associate", "- Python: scripting\n- SQL: reporting"),
+    ("j4", "Data Engineer", "Initech", "Mid-Senior level", "- Spark: pipelines\n- Python: ETL"),
+], columns=["job_id", "job_title", "company_name", "job_experience_level", "job_skills_required"])
+
+
+@pytest.fixture
+def index():
+    return SearchIndex().sync(JOBS, 1)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("java", {"j1", "j2"}),
+    ("Java AND Spring", {"j1"}),
+    ("java spring", {"j1"}),
+    ("java, acme", {"j1"}),
+    ("java OR python", {"j1", "j2", "j3", "j4"}),
+    ("developer not senior", {"j3"}),
+    ("developer -senior", {"j3"}),
+    ("(java OR spark) AND engineer", {"j2", "j4"}),
+    ('"java developer"', {"j1"}),
+    ('"developer java"', set()),
+    ('"senior java"', {"j1"}),
+    ('"senior developer"', set()),
+    ('"java dev*"', {"j1"}),
+    ('"java spring"', set()),
+    ("eng*", {"j2", "j4"}),
+    ("company:acme", {"j1", "j3"}),
+    ("skill:sql", {"j2", "j3"}),
+    ("level:senior", {"j1", "j4"}),
+    ("title:python", {"j3"}),
+    ("cobol", set()),
+])
+def test_queries(index, query, expected):
+    assert index.search(query) == expected
+
+
+@pytest.mark.parametrize("query", ["(java", "java OR", "java )", "NOT"])
+def test_invalid_queries(index, query):
+    with pytest.raises(QueryError):
+        index.search(query)
+
+
+def test_skill_facets_narrow_the_matches(index):
+    assert index.search("", ["sql"]) == {"j2", "j3"}
+    assert index.search("acme", ["sql"]) == {"j3"}
+    assert ("sql", "SQL", 2) in index.facets()
+
+
+def test_sync_adds_and_removes_only_changed_jobs(index):
+    added = pd.DataFrame([("j5", "Go Developer", "Hooli", "Associate", "- Go: services")], columns=JOBS.columns)
+    index.sync(pd.concat([JOBS[JOBS["job_id"] != "j1"], added]), 2)
+    assert index.search("java") == {"j2"}
+    assert index.search("developer") == {"j3", "j5"}
+    assert index.search("", ["spring boot"]) == set()
+
+
+def test_phrases_need_adjacent_words_in_one_field():
+    jobs = pd.DataFrame([
+        ("j1", "Boot Camp Instructor", "Acme", "Associate", "- Spring: framework"),
+        ("j2", "Backend Developer", "Globex", "Associate", "- Spring Boot: APIs"),
+    ], columns=JOBS.columns)
+    index = SearchIndex().sync(jobs, 1)
+    assert index.search("spring boot") == {"j1", "j2"}
+    assert index.search('"spring boot"') == {"j2"}
+    assert index.search('"boot spring"') == set()
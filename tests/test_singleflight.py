@@ -0,0 +1,116 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import Abandoned, SingleFlight
+
+
+def wait_for_followers(flights, count):
+    """Blocks until `count` callers have joined an existing flight."""
+    while flights.stats()["shared"] < count:
+        time.sleep(0.001)
+
+
+def in_threads(count, fn):
+    threads = [threading.Thread(target=fn) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_concurrent_calls_share_one_execution():
+    flights, release = SingleFlight("test"), threading.Event()
+    calls, results = [], []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    threads = in_threads(5, lambda: results.append(flights.do("key", fn)))
+    wait_for_followers(flights, 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == ["result"] * 5
+    assert flights.stats() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+
+def test_results_are_shared_within_the_window_only(clock):
+    flights = SingleFlight("test", window=5, timer=clock)
+    calls = []
+    fn = lambda: calls.append(1) or len(calls)
+    assert flights.do("key", fn) == 1
+    clock.now = 4.9
+    assert flights.do("key", fn) == 1
+    clock.now = 5.0
+    assert flights.do("key", fn) == 2
+    assert flights.do("other", fn) == 3
+
+
+def test_errors_are_not_shared_after_the_fact():
+    flights = SingleFlight("test", window=60)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("boom")
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            flights.do("key", fail)
+    assert len(calls) == 2
+
+
+def test_forget_stops_sharing():
+    flights = SingleFlight("test", window=60)
+    calls = []
+    fn = lambda: calls.append(1) or len(calls)
+    flights.do(("a", "jobs"), fn)
+    flights.do(("b", "jobs"), fn)
+    flights.forget(lambda key: key[0] == "a")
+    assert flights.do(("a", "jobs"), fn) == 3
+    assert flights.do(("b", "jobs"), fn) == 2
+
+
+def test_stream_followers_replay_the_leaders_items():
+    flights = SingleFlight("test")
+    step = threading.Semaphore(0)
+
+    def items():
+        for item in range(3):
+            step.acquire()
+            yield item
+
+    leader = flights.stream("key", items)
+    step.release()
+    assert next(leader) == 0
+    replayed = []
+    [thread] = in_threads(1, lambda: replayed.extend(flights.stream("key", lambda: pytest.fail("followers don't run the call"))))
+    wait_for_followers(flights, 1)
+    step.release()
+    step.release()
+    assert list(leader) == [1, 2]
+    thread.join(5)
+    assert replayed == [0, 1, 2]
+
+
+def test_followers_of_an_abandoned_stream_are_told():
+    flights = SingleFlight("test")
+    leader = flights.stream("key", lambda: iter(range(3)))
+    assert next(leader) == 0
+    errors = []
+
+    def follow():
+        try:
+            list(flights.stream("key", lambda: iter(())))
+        except Abandoned as e:
+            errors.append(e)
+
+    [thread] = in_threads(1, follow)
+    wait_for_followers(flights, 1)
+    leader.close()
+    thread.join(5)
+    assert len(errors) == 1
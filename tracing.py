@@ -0,0 +1,178 @@
+"""
+Per-rerun tracing of queries, backend calls and page rendering.
+
+Tracing is off unless a rerun is started with `tracer.begin(enabled=True)` (TRACING=1, or ?debug=1
+for one session). While off, `tracer.span()` returns a shared no-op span, so instrumented code
+only pays for one context-variable lookup.
+"""
+import contextvars
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+
+import numpy as np
+
+TRACING = os.environ.get("TRACING", "0") == "1"
+# Where finished traces are written as JSONL ("-" for stdout, empty to disable). Not stdout by
+# default: the app prints free-text messages there, which would break line-by-line JSON parsing.
+TRACE_FILE = os.environ.get("TRACE_FILE", "traces.jsonl")
+# Durations kept per span name for the rolling percentiles
+WINDOW = int(os.environ.get("TRACE_WINDOW", 500))
+
+_current = contextvars.ContextVar("trace", default=None)
+
+
+class Trace:
+    def __init__(self, attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.attrs = attrs
+        self.started = time.time()
+        self.spans = []
+
+
+class Span:
+    __slots__ = ("tracer", "trace", "name", "attrs", "start", "duration")
+
+    def __init__(self, tracer, trace, name, attrs):
+        self.tracer = tracer
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(error=exc_type.__name__ if exc_type else None)
+        return False
+
+    def finish(self, error=None):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self.start
+        if error:
+            self.attrs["error"] = error
+        self.trace.spans.append(self)
+        self.tracer._observe(self.name, self.duration)
+
+    def to_dict(self):
+        return {"name": self.name, "ms": round(self.duration * 1000, 3), **self.attrs}
+
+
+class _NoopSpan:
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def finish(self, error=None):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    def __init__(self, path=TRACE_FILE, window=WINDOW):
+        self.path = path
+        self.window = window
+        self.durations = {}  # span name -> recent durations in seconds
+        self._lock = threading.Lock()
+
+    def begin(self, enabled=TRACING, **attrs):
+        """Starts tracing a rerun in the current context, flushing any rerun that never ended."""
+        self.end()
+        _current.set(Trace(attrs) if enabled else None)
+
+    def end(self):
+        """Finishes the current rerun's trace and writes it out; returns it (or None if tracing was off)."""
+        trace = _current.get()
+        if trace is None:
+            return None
+        _current.set(None)
+        self._emit(trace)
+        return trace
+
+    def current(self):
+        return _current.get()
+
+    def span(self, name, **attrs):
+        trace = _current.get()
+        if trace is None:
+            return NOOP_SPAN
+        return Span(self, trace, name, attrs)
+
+    def start(self, name, **attrs):
+        """Starts a span that is closed explicitly with `.finish()`."""
+        return self.span(name, **attrs).__enter__()
+
+    def _observe(self, name, seconds):
+        with self._lock:
+            durations = self.durations.get(name)
+            if durations is None:
+                durations = self.durations[name] = deque(maxlen=self.window)
+            durations.append(seconds)
+
+    def _emit(self, trace):
+        if not self.path:
+            return
+        line = json.dumps({
+            "trace": trace.id,
+            "ts": trace.started,
+            **trace.attrs,
+            "spans": [span.to_dict() for span in trace.spans],
+        }, default=str)
+        if self.path == "-":
+            print(line, file=sys.stdout, flush=True)
+        else:
+            with self._lock, open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def stats(self):
+        """Rolling count / p50 / p95 / max in milliseconds per span name."""
+        with self._lock:
+            snapshot = {name: np.array(durations) * 1000 for name, durations in self.durations.items()}
+        return {
+            name: {
+                "count": len(ms),
+                "p50": float(np.percentile(ms, 50)),
+                "p95": float(np.percentile(ms, 95)),
+                "max": float(ms.max()),
+            }
+            for name, ms in snapshot.items() if len(ms)
+        }
+
+
+tracer = Tracer()
+
+
+def traced(name, size=None):
+    """Decorator wrapping each call in a span; `size(result)` is recorded as the payload size."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            span = tracer.span(name)
+            if span is NOOP_SPAN:
+                return fn(*args, **kwargs)
+            with span:
+                result = fn(*args, **kwargs)
+                if size is not None and result is not None:
+                    span.set(size=size(result))
+                return result
+        return wrapper
+    return decorator